@@ -0,0 +1,117 @@
+'''Activation functions of the network layers, on whole arrays, with their derivatives.
+
+Every `Activation` works on a single vector or a batch (one sample per row) and
+knows how to backpropagate through itself, so `model.NetworkModel` and
+`training.Trainer` can use a different one per layer:
+
+    model = NetworkModel.random([2, 3, 3, 1], activations=['relu', 'relu', 'sigmoid'])
+
+Elementwise activations also describe the curve drawn by `insets.ActivationInset`
+(``x_range``); softmax, whose outputs depend on the whole layer, has none.
+'''
+import numpy as np
+
+
+class Activation:
+    '''``function(z)`` and the derivative used to backpropagate through it.
+
+    ``derivative(z, a)`` gets the pre-activations and the activations, so functions
+    whose derivative is cheaper from their output (tanh, sigmoid) can use it.
+    Non-elementwise activations give ``backward`` instead: the gradient with respect
+    to ``z`` from ``(z, a, grad)``, ``grad`` being the gradient with respect to ``a``.
+    '''
+
+    def __init__(self, name, function, derivative=None, backward=None, x_range=(-3, 3), tex=None):
+        assert (derivative is None) != (backward is None), "Give either an elementwise derivative or a backward function."
+        self.name        = name
+        self.function    = function
+        self.derivative  = derivative
+        self._backward   = backward
+        self.x_range     = x_range if derivative is not None else None
+        self.tex         = tex if tex is not None else rf"\mathrm{{{name}}}"
+
+
+    @property
+    def elementwise(self):
+        return self.derivative is not None
+
+
+    def __call__(self, z):
+        return self.function(np.asarray(z, dtype=float))
+
+
+    def backward(self, z, a, grad):
+        '''Gradient with respect to the pre-activations ``z``, given the one with respect to ``a``.'''
+        if self._backward is not None:
+            return self._backward(z, a, grad)
+        return grad * self.derivative(z, a)
+
+
+    def __repr__(self):
+        return f'Activation({self.name!r})'
+
+
+def _sigmoid(z):
+    #-- through tanh, which does not overflow for large |z|
+    return 0.5 * (1 + np.tanh(0.5 * z))
+
+
+GELU_C = np.sqrt(2 / np.pi)
+
+
+def _gelu(z):
+    '''GELU with the tanh approximation.'''
+    return 0.5 * z * (1 + np.tanh(GELU_C * (z + 0.044715 * z ** 3)))
+
+
+def _gelu_derivative(z, a):
+    t = np.tanh(GELU_C * (z + 0.044715 * z ** 3))
+    return 0.5 * (1 + t) + 0.5 * z * (1 - t ** 2) * GELU_C * (1 + 3 * 0.044715 * z ** 2)
+
+
+def _softmax(z):
+    e = np.exp(z - z.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _softmax_backward(z, a, grad):
+    return a * (grad - (grad * a).sum(axis=-1, keepdims=True))
+
+
+ACTIVATIONS = {}
+
+
+def register(activation):
+    '''Make ``activation`` selectable by its name.'''
+    ACTIVATIONS[activation.name] = activation
+    return activation
+
+
+register(Activation('identity', lambda z: z,                   lambda z, a: np.ones_like(z),            x_range=(-2, 2), tex=r"z"))
+register(Activation('tanh',     np.tanh,                       lambda z, a: 1 - a ** 2,                 x_range=(-3, 3), tex=r"\tanh"))
+register(Activation('sigmoid',  _sigmoid,                      lambda z, a: a * (1 - a),                x_range=(-6, 6), tex=r"\sigma"))
+register(Activation('relu',     lambda z: np.maximum(z, 0),    lambda z, a: (z > 0).astype(float),      x_range=(-2, 2)))
+register(Activation('gelu',     _gelu,                         _gelu_derivative,                        x_range=(-3, 3)))
+register(Activation('softmax',  _softmax,                      backward=_softmax_backward))
+
+DEFAULT_ACTIVATION = 'tanh'
+
+
+def get_activation(activation):
+    '''`Activation` from a registered name; `Activation` instances are returned as they are.'''
+    if isinstance(activation, Activation):
+        return activation
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Unknown activation `{activation}`, expected one of {', '.join(ACTIVATIONS)}.")
+    return ACTIVATIONS[activation]
+
+
+def layer_activations(activations, num_layers):
+    '''One `Activation` per layer transition from a name, a list of names or None (tanh everywhere).'''
+    if activations is None:
+        activations = DEFAULT_ACTIVATION
+    if isinstance(activations, (str, Activation)):
+        activations = [activations] * num_layers
+    activations = [get_activation(activation) for activation in activations]
+    assert len(activations) == num_layers, f"{len(activations)} activations for {num_layers} layers"
+    return activations
@@ -0,0 +1,87 @@
+'''Rasterize the static skeleton of a scene once and keep it as the camera background.
+
+Within one ``play`` call manim already draws the mobjects that do not move only
+once, but it draws them again for every ``play``, so a propagation scene with
+hundreds of short animations re-rasterizes every node and edge hundreds of times.
+`FrozenBackground` draws the given mobjects into the camera's background image
+once and removes them from the scene; every frame then starts from that image
+and only the labels and highlights on top are drawn.
+
+Before each ``play`` the frozen mobjects are fingerprinted (their points and
+styles, which is much cheaper than drawing them); if anything changed, e.g. an
+animation recolored a node, the background is rendered again. Mobjects with
+updaters are never frozen, since they could change during a ``play``.
+
+manim leaves the camera background out of the hash that names each partial movie,
+so the fingerprint is also kept on an empty `Mobject` left in the scene (which
+draws nothing): a change to the frozen mobjects changes the hash of every
+``play`` after it instead of reusing movies rendered over the old background.
+'''
+import hashlib
+
+from manim import *
+
+
+def style_fingerprint(mobjects):
+    '''Hash of the points and stroke/fill styles of the families of ``mobjects``.'''
+    digest = hashlib.blake2b(digest_size=16)
+    for mobject in mobjects:
+        for member in mobject.get_family():
+            digest.update(np.ascontiguousarray(member.points).tobytes())
+            if isinstance(member, VMobject):
+                digest.update(np.ascontiguousarray(member.get_fill_rgbas()).tobytes())
+                digest.update(np.ascontiguousarray(member.get_stroke_rgbas()).tobytes())
+                digest.update(np.float64(member.get_stroke_width()).tobytes())
+    return digest.hexdigest()
+
+
+class FrozenBackground:
+    '''Mobjects drawn into the background of ``scene``'s camera instead of every frame.'''
+
+    def __init__(self, scene, mobjects):
+        self.scene    = scene
+        self.camera   = scene.renderer.camera
+        self.mobjects = [mobject for mobject in mobjects if not any(member.updaters for member in mobject.get_family())]
+        self.base_background = self.camera.background.copy()
+        self.fingerprint = None
+        self.renders     = 0
+        self.proxy       = Mobject()
+
+
+    def render(self):
+        '''Draw the frozen mobjects over the original background and make that the new background.'''
+        self.camera.set_background(self.base_background)
+        self.camera.reset()
+        self.camera.capture_mobjects(self.mobjects)
+        self.camera.set_background(self.camera.pixel_array.copy())
+        self.fingerprint = style_fingerprint(self.mobjects)
+        self.proxy.background_fingerprint = self.fingerprint
+        self.renders += 1
+
+
+    def freeze(self):
+        self.render()
+        self.scene.remove(*self.mobjects)
+        self.scene.add(self.proxy)
+        return self
+
+
+    def refresh(self):
+        '''Render the background again if a frozen mobject changed since it was drawn.
+
+        Animating a frozen mobject adds it back to the scene; it is removed again
+        once its new state is part of the background.
+        '''
+        if style_fingerprint(self.mobjects) == self.fingerprint:
+            return False
+        self.render()
+        self.scene.remove(*self.mobjects)
+        return True
+
+
+    def thaw(self):
+        '''Restore the original background and put the mobjects back, behind everything else.'''
+        self.camera.set_background(self.base_background)
+        self.scene.remove(self.proxy)
+        self.scene.add(*self.mobjects)
+        self.scene.bring_to_back(*self.mobjects)
@@ -0,0 +1,22 @@
+'''Aggregated views of a whole batch of samples: heatmaps and colormaps, no per-sample mobjects.'''
+from manim import *
+
+
+def diverging_colormap(values, vmin=-1, vmax=1, low=BLUE, mid=BLACK, high=RED):
+    '''Map ``values`` to uint8 RGBA, ``low`` at ``vmin`` through ``mid`` to ``high`` at ``vmax``.'''
+    t = np.clip((np.asarray(values, dtype=float) - vmin) / (vmax - vmin), 0, 1)
+    stops = np.array([color_to_rgb(low), color_to_rgb(mid), color_to_rgb(high)])
+
+    rgb = np.stack([np.interp(t, [0, 0.5, 1], stops[:, channel]) for channel in range(3)], axis=-1)
+    rgba = np.concatenate([rgb, np.ones(t.shape + (1,))], axis=-1)
+    return (rgba * 255).astype(np.uint8)
+
+
+def activation_heatmap(activations, width, height, vmin=-1, vmax=1):
+    '''Image of an ``(N, neurons)`` activation matrix: one row per neuron, one column per sample.'''
+    pixels = diverging_colormap(np.asarray(activations).T, vmin=vmin, vmax=vmax)
+    heatmap = ImageMobject(pixels)
+    heatmap.set_resampling_algorithm(RESAMPLING_ALGORITHMS["nearest"])
+    heatmap.stretch_to_fit_width(width)
+    heatmap.stretch_to_fit_height(height)
+    return heatmap
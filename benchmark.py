@@ -0,0 +1,187 @@
+'''Benchmarks of building and rendering networks of increasing size.
+
+For every architecture (``inputs x hidden width x hidden layers``, one output) it
+measures, for `NeuralNetworkVisualisation` and for medium.py's builders:
+
+* mobject construction time with empty label caches (``cold_build_s``, after
+  `labels.clear_caches`) and with the caches the previous runs filled (best of
+  ``--repeat`` runs); TeX compiled to disk by an earlier build stays cached
+* peak traced memory during construction
+* number of mobjects and points produced
+* low quality render time (``--render``, only up to ``--render-max-edges`` edges)
+
+Results are written as JSON. Given ``--baseline``, every time and memory metric is
+compared with the saved run and the script exits with status 1 if any of them got
+slower or bigger by more than ``--tolerance``.
+
+    python benchmark.py -o bench.json
+    python benchmark.py --sizes 2x3x1 64x128x4 --baseline bench.json
+'''
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import manim
+from manim import tempconfig
+
+import medium
+import scene
+from labels import clear_caches
+from profiling import mobject_counts
+from sizes import parse_size
+
+
+SIZES = ['2x3x1', '2x3x2', '16x32x3', '64x128x4', '256x256x6', '1024x1024x10']
+
+# Metrics where a larger value is a regression.
+COMPARED_METRICS = ('cold_build_s', 'build_s', 'peak_mb', 'render_s')
+# Horizontal distance between the layers built with medium.py's functions.
+RIGHT_STEP = manim.RIGHT * 3
+
+
+def dense_edges(layer_sizes):
+    return sum((n_in + 1) * n_out for n_in, n_out in zip(layer_sizes, layer_sizes[1:]))
+
+
+def measure(build, repeat):
+    '''Wall time of ``build()`` with cold label caches, best over ``repeat`` warm runs, its peak memory and mobject counts.'''
+    clear_caches()
+    start = time.perf_counter()
+    build()
+    cold = time.perf_counter() - start
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    mobjects = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    num_mobjects, num_points = mobject_counts(mobjects)
+    return {'cold_build_s': cold, 'build_s': best, 'peak_mb': peak / 2**20, 'mobjects': num_mobjects, 'points': num_points}
+
+
+def scene_class(layer_sizes):
+    return type('BenchmarkNetwork', (scene.NeuralNetworkVisualisation,), {'layer_sizes': layer_sizes})
+
+
+def build_scene_network(layer_sizes):
+    network_scene = scene_class(layer_sizes)()
+    network_scene.create_model()
+    layers = network_scene.create_layers()
+    connections = network_scene.create_connections()
+    return [layers, connections]
+
+
+def build_medium_network(layer_sizes, bundle):
+    layers = [
+        medium.generate_network_layer(num_nodes, include_bias=l < len(layer_sizes) - 1, layer_idx=l)
+        for l, num_nodes in enumerate(layer_sizes)
+    ]
+    for l, layer in enumerate(layers):
+        layer.shift(RIGHT_STEP * l)
+
+    connect = medium.generate_layer_connection_bundle if bundle else medium.generate_layer_connections
+    connections = [connect(layer[0], next_layer[0]) for layer, next_layer in zip(layers, layers[1:])]
+    return layers + connections
+
+
+def render_time(scene_cls):
+    start = time.perf_counter()
+    scene_cls().render()
+    return time.perf_counter() - start
+
+
+def run(sizes, repeat=3, render=False, medium_max_edges=20000, render_max_edges=2000):
+    results = {}
+    with tempfile.TemporaryDirectory() as media_dir, tempconfig({
+        'media_dir'       : media_dir,
+        'quality'         : 'low_quality',
+        'disable_caching' : True,
+        'progress_bar'    : 'none',
+        'verbosity'       : 'ERROR',
+    }):
+        for size in sizes:
+            layer_sizes = parse_size(size)
+            edges = dense_edges(layer_sizes)
+            print(f"{size}: {edges} dense edges", flush=True)
+
+            entry = {'layer_sizes': layer_sizes, 'dense_edges': edges}
+            entry['scene'] = measure(lambda: build_scene_network(layer_sizes), repeat)
+
+            if edges <= medium_max_edges:
+                entry['medium_arrows'] = measure(lambda: build_medium_network(layer_sizes, bundle=False), repeat)
+                entry['medium_bundle'] = measure(lambda: build_medium_network(layer_sizes, bundle=True), repeat)
+
+            if render and edges <= render_max_edges:
+                entry['scene']['render_s'] = render_time(scene_class(layer_sizes))
+            results[size] = entry
+
+        if render:
+            #-- TestNetwork has a fixed 2-3-1 architecture, so it is rendered once
+            results['TestNetwork'] = {'medium_scene': {'render_s': render_time(medium.TestNetwork)}}
+
+    return {
+        'meta': {
+            'timestamp' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python'    : platform.python_version(),
+            'platform'  : platform.platform(),
+            'manim'     : manim.__version__,
+            'repeat'    : repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    '''Print every compared metric next to its baseline; returns the list of regressions.'''
+    regressions = []
+    for size, entry in current['results'].items():
+        for group, metrics in entry.items():
+            if not isinstance(metrics, dict):
+                continue
+            saved = baseline['results'].get(size, {}).get(group, {})
+            for metric in COMPARED_METRICS:
+                if metric not in metrics or not saved.get(metric):
+                    continue
+                ratio = metrics[metric] / saved[metric]
+                flag = 'REGRESSION' if ratio > 1 + tolerance else ''
+                print(f"{size:>14} {group:>14} {metric:>9}: {saved[metric]:10.4f} -> {metrics[metric]:10.4f} ({ratio:5.2f}x) {flag}")
+                if flag:
+                    regressions.append((size, group, metric, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='*', default=SIZES, help='inputs x hidden width x hidden layers, e.g. 16x32x3')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--render', action='store_true', help='also time low quality renders')
+    parser.add_argument('--medium-max-edges', type=int, default=20000, help='skip medium.py builders above this many edges')
+    parser.add_argument('--render-max-edges', type=int, default=2000)
+    parser.add_argument('-o', '--output', default='bench.json')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    current = run(args.sizes, args.repeat, args.render, args.medium_max_edges, args.render_max_edges)
+    with open(args.output, 'w') as file:
+        json.dump(current, file, indent=1)
+    print(f"wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(current, json.load(file), args.tolerance)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+'''Run a scene's ``construct`` without rendering anything, to size it before a real render.
+
+The scene is played by a `CairoRenderer` that skips every animation, under
+manim's ``dry_run`` config (nothing is written to disk), and with ``Text``,
+``MathTex`` and ``Tex`` replaced by `StubText` rectangles of about the same size,
+so no LaTeX or Pango runs. Every ``play``/``wait`` is recorded with its run time,
+frame count and the mobjects and points on screen afterwards; from these the
+report estimates how long a real render would take. Scenes that freeze their
+background play with ``freeze_background`` off, so the network stays in
+``scene.mobjects`` and nothing is rasterized.
+
+    python dryrun.py
+    python dryrun.py --scene NeuralNetworkVisualisation --size 256x256x6 -q h --timeline
+    python dryrun.py -o dryrun.json
+
+The estimate is linear in the frames, the points drawn per frame and the number of
+``play`` calls; the coefficients below are rough, override them with
+``--seconds-per-frame`` etc. after comparing with an ``NN_PROFILE`` report.
+'''
+import argparse
+import importlib
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+from manim import DL, DR, UL, UR, VMobject, Wait, config, tempconfig
+from manim.mobject.geometry import labeled
+from manim.mobject.text import numbers
+from manim.renderer.cairo_renderer import CairoRenderer
+
+import labels
+from labels import label_factory
+from parallel_render import QUALITIES
+from profiling import mobject_counts
+from sizes import parse_size
+
+
+# Scenes sized when no ``--scene`` is given, as ``(module, class)``.
+SCENES = [('scene', 'NeuralNetworkVisualisation'), ('medium', 'TestNetwork')]
+# Names of the text classes replaced by `StubText` in the patched modules.
+STUBBED_NAMES = ('Text', 'MarkupText', 'Tex', 'MathTex', 'SingleStringMathTex')
+# Style keywords a stub keeps; everything text specific is dropped.
+STUB_KWARGS = ('color', 'fill_color', 'fill_opacity', 'stroke_color', 'stroke_opacity', 'stroke_width')
+
+# Rough Cairo cost model, for a 1920x1080 frame (scaled with the pixel count).
+SECONDS_PER_FRAME       = 0.01    # clearing, copying and encoding a frame
+SECONDS_PER_POINT_FRAME = 2e-6    # drawing one bezier point in one frame
+SECONDS_PER_PLAY        = 0.1     # opening and closing a partial movie file, concatenation
+
+
+class StubText(VMobject):
+    '''Rectangle standing in for a text mobject: about its size, none of its glyphs.'''
+    char_width  = 0.25 / 48
+    line_height = 0.35 / 48
+
+    def __init__(self, *text, font_size=48, **kwargs):
+        super().__init__(**{key: value for key, value in kwargs.items() if key in STUB_KWARGS})
+        self.text = self.tex_string = ''.join(str(part) for part in text)
+        half = [max(1, len(self.text)) * font_size * self.char_width / 2, font_size * self.line_height / 2, 0]
+        self.set_points_as_corners([UL * half, UR * half, DR * half, DL * half, UL * half])
+
+
+@contextmanager
+def stubbed_text(modules):
+    '''Replace the text classes in ``modules`` and in `labels.label_factory` with `StubText`.'''
+    originals = []
+    for module in modules:
+        for name in STUBBED_NAMES:
+            if hasattr(module, name):
+                originals.append((module, name, getattr(module, name)))
+                setattr(module, name, StubText)
+
+    get, tex_batch = label_factory.get, label_factory.tex_batch
+    label_factory.get = lambda text, font_size, cls=None, **kwargs: get(text, font_size, StubText, **kwargs)
+    label_factory.tex_batch = None
+    atlases = dict(labels._atlases)
+    labels._atlases.clear()
+    try:
+        yield
+    finally:
+        for module, name, original in reversed(originals):
+            setattr(module, name, original)
+        del label_factory.get
+        label_factory.tex_batch = tex_batch
+        for key in [key for key in label_factory._cache if key[2] is StubText]:
+            del label_factory._cache[key]
+        labels._atlases.clear()
+        labels._atlases.update(atlases)
+
+
+def estimate_seconds(timeline, pixels, per_frame=SECONDS_PER_FRAME, per_point_frame=SECONDS_PER_POINT_FRAME, per_play=SECONDS_PER_PLAY):
+    '''Estimated render time of the recorded ``timeline`` at ``pixels`` per frame.'''
+    pixel_scale = pixels / (1920 * 1080)
+    seconds = 0.0
+    for entry in timeline:
+        frame_cost = per_frame * pixel_scale
+        if not entry['frozen']:
+            frame_cost += per_point_frame * entry['points']
+        seconds += entry['frames'] * frame_cost + per_play
+    return seconds
+
+
+def dry_run(scene_cls, quality='low_quality', on_play=None, **cost):
+    '''Play ``scene_cls`` without rendering; returns its timeline, counts and estimated render time.
+
+    ``on_play(scene, entry)`` is called after every recorded ``play`` with its timeline entry.
+    '''
+    timeline = []
+    #-- the modules defining the scene and its bases, plus the ones building text for them
+    modules = {sys.modules[cls.__module__] for cls in scene_cls.__mro__ if not cls.__module__.startswith(('manim', 'builtins'))}
+    modules |= {labeled, numbers}
+    modules |= {sys.modules[name] for name in ('medium', 'network', 'scene') if name in sys.modules}
+    #-- a frozen background would take the network out of `scene.mobjects` and rasterize it
+    if getattr(scene_cls, 'freeze_background', False):
+        scene_cls = type(scene_cls.__name__, (scene_cls,), {'freeze_background': False})
+
+    with tempconfig({
+        'dry_run'         : True,
+        'quality'         : quality,
+        'disable_caching' : True,
+        'progress_bar'    : 'none',
+        'verbosity'       : 'ERROR',
+    }), stubbed_text(modules):
+        renderer = CairoRenderer(skip_animations=True)
+        scene = scene_cls(renderer=renderer)
+
+        play = renderer.play
+        def recording_play(scene, *args, **kwargs):
+            start = renderer.time
+            play(scene, *args, **kwargs)
+            mobjects, points = mobject_counts(scene.mobjects)
+            timeline.append({
+                'start'      : start,
+                'run_time'   : scene.duration,
+                'frames'     : int(round(scene.duration * config.frame_rate)),
+                'animations' : [type(animation).__name__ for animation in scene.animations],
+                'frozen'     : len(scene.animations) == 1 and isinstance(scene.animations[0], Wait) and scene.animations[0].is_static_wait,
+                'mobjects'   : mobjects,
+                'points'     : points,
+            })
+            if on_play is not None:
+                on_play(scene, timeline[-1])
+        renderer.play = recording_play
+
+        start = time.perf_counter()
+        scene.render()
+        wall = time.perf_counter() - start
+        pixels = config.pixel_width * config.pixel_height
+        resolution = f'{config.pixel_width}x{config.pixel_height}@{config.frame_rate:g}'
+
+    return {
+        'scene'       : scene_cls.__name__,
+        'resolution'  : resolution,
+        'dry_run_s'   : wall,
+        'plays'       : len(timeline),
+        'frames'      : sum(entry['frames'] for entry in timeline),
+        'duration_s'  : sum(entry['run_time'] for entry in timeline),
+        'max_mobjects': max((entry['mobjects'] for entry in timeline), default=0),
+        'max_points'  : max((entry['points'] for entry in timeline), default=0),
+        'estimated_render_s': estimate_seconds(timeline, pixels, **cost),
+        'timeline'    : timeline,
+    }
+
+
+def print_report(report, show_timeline=False):
+    print(f"{report['scene']} ({report['resolution']}), dry run in {report['dry_run_s'] * 1000:.0f} ms")
+    if show_timeline:
+        for k, entry in enumerate(report['timeline']):
+            print(f"  {k:5d} {entry['start']:8.2f}s {entry['run_time']:6.2f}s {entry['frames']:5d} frames "
+                  f"{entry['mobjects']:7d} mobjects {entry['points']:9d} points  {', '.join(entry['animations'])}")
+    print(f"  {report['plays']} play calls, {report['frames']} frames ({report['duration_s']:.1f} s of video)")
+    print(f"  up to {report['max_mobjects']} mobjects and {report['max_points']} points on screen")
+    print(f"  estimated render time: {report['estimated_render_s']:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default=None, help='module of --scene (default: scene, then medium)')
+    parser.add_argument('--scene', default=None, help='scene class; NeuralNetworkVisualisation and TestNetwork when not given')
+    parser.add_argument('--size', default=None, help='inputs x hidden width x hidden layers, for scenes with `layer_sizes`')
+    parser.add_argument('-q', '--quality', choices=QUALITIES, default='l')
+    parser.add_argument('--timeline', action='store_true', help='print every play call')
+    parser.add_argument('-o', '--output', default=None, help='write the reports as JSON')
+    parser.add_argument('--seconds-per-frame', type=float, default=SECONDS_PER_FRAME)
+    parser.add_argument('--seconds-per-point-frame', type=float, default=SECONDS_PER_POINT_FRAME)
+    parser.add_argument('--seconds-per-play', type=float, default=SECONDS_PER_PLAY)
+    args = parser.parse_args()
+
+    if args.scene is None:
+        scenes = SCENES
+    else:
+        module = args.module
+        if module is None:
+            module = next(name for name, _ in SCENES if hasattr(importlib.import_module(name), args.scene))
+        scenes = [(module, args.scene)]
+
+    reports = []
+    for module_name, scene_name in scenes:
+        scene_cls = getattr(importlib.import_module(module_name), scene_name)
+        if args.size is not None and hasattr(scene_cls, 'layer_sizes'):
+            scene_cls = type(scene_name, (scene_cls,), {'layer_sizes': parse_size(args.size)})
+        report = dry_run(
+            scene_cls,
+            QUALITIES[args.quality],
+            per_frame       = args.seconds_per_frame,
+            per_point_frame = args.seconds_per_point_frame,
+            per_play        = args.seconds_per_play,
+        )
+        print_report(report, args.timeline)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(reports, file, indent=1)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
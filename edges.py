@@ -0,0 +1,167 @@
+from manim import *
+
+
+# Straight segment a -> b as the four control points of a cubic bezier curve.
+_SEGMENT = np.array([0, 1/3, 2/3, 1])[None, :, None]
+
+
+def _segments(a, b):
+    return a[:, None, :] + _SEGMENT * (b - a)[:, None, :]
+
+
+class EdgeBundle(VGroup):
+    '''All connections between two layers, stored in one contiguous points array.
+
+    Edge ``k`` runs from ``starts[k]`` to ``ends[k]`` and owns the slice
+    ``edge_points[k]`` (its line plus, optionally, a triangular tip). Colors and
+    widths are kept per edge in ``edge_rgbas`` / ``edge_widths``. Edges sharing a
+    (quantized) style are drawn as one multi-path ``VMobject``, so the renderer walks
+    one submobject per distinct style instead of one ``Line`` and tip per edge,
+    while every edge can still be restyled or located on its own.
+    '''
+
+    def __init__(
+        self,
+        starts,
+        ends,
+        color          = WHITE,
+        stroke_width   = 0.5,
+        stroke_opacity = 1,
+        add_tips       = True,
+        tip_length     = 0.15,
+        tip_width      = 0.15,
+        style_levels   = 32,
+        **kwargs,
+        ):
+        super().__init__(**kwargs)
+        starts = np.array(starts, dtype=float).reshape(-1, 3)
+        ends   = np.array(ends, dtype=float).reshape(-1, 3)
+        num_edges = len(starts)
+
+        self.add_tips     = add_tips
+        self.style_levels = style_levels
+        self.edge_rgbas   = np.tile(color_to_rgba(color, stroke_opacity), (num_edges, 1))
+        self.edge_widths  = np.full(num_edges, float(stroke_width))
+        self.edge_points  = self._build_points(starts, ends, tip_length, tip_width)
+        self.rebuild()
+
+
+    def _build_points(self, starts, ends, tip_length, tip_width):
+        if not self.add_tips:
+            return _segments(starts, ends)
+
+        vectors = ends - starts
+        lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+        directions = vectors / np.where(lengths == 0, 1, lengths)
+        normals = np.column_stack([-directions[:, 1], directions[:, 0], np.zeros(len(directions))])
+
+        base = ends - directions * tip_length
+        left  = base + normals * tip_width / 2
+        right = base - normals * tip_width / 2
+
+        return np.concatenate([
+            _segments(starts, base),
+            _segments(ends, left),
+            _segments(left, right),
+            _segments(right, ends),
+        ], axis=1)
+
+
+    @property
+    def num_edges(self):
+        return len(self.edge_points)
+
+
+    @property
+    def points_per_edge(self):
+        return self.edge_points.shape[1]
+
+
+    def _sync_points(self):
+        '''Pull the current geometry back from the drawn paths (after shifts, scales, ...).'''
+        for path, members in zip(self.submobjects, self._members):
+            if len(path.points) == len(members) * self.points_per_edge:
+                self.edge_points[members] = path.points.reshape(len(members), self.points_per_edge, 3)
+
+
+    def rebuild(self):
+        '''Regroup the edges into one path per distinct style.'''
+        if self.submobjects:
+            self._sync_points()
+
+        levels = self.style_levels
+        widths = np.round(self.edge_widths * 4) / 4
+        keys = np.column_stack([np.round(self.edge_rgbas * levels) / levels, widths])
+        styles, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(styles) + 1))
+
+        paths = []
+        self._members = []
+        for b, style in enumerate(styles):
+            members = order[bounds[b]:bounds[b+1]]
+            color = rgba_to_color(style[:4])
+            path = VMobject()
+            path.set_points(self.edge_points[members].reshape(-1, 3))
+            path.set_stroke(color=color, width=style[4], opacity=style[3])
+            path.set_fill(color=color, opacity=style[3] if self.add_tips else 0)
+            paths.append(path)
+            self._members.append(members)
+
+        self.edge_bucket = inverse
+        self.edge_slot = np.empty(self.num_edges, dtype=int)
+        for members in self._members:
+            self.edge_slot[members] = np.arange(len(members))
+
+        self.submobjects = []
+        self.add(*paths)
+        return self
+
+
+    def _edge_point(self, k, point_idx):
+        path = self.submobjects[self.edge_bucket[k]]
+        return path.points[self.edge_slot[k] * self.points_per_edge + point_idx].copy()
+
+
+    def get_edge_start(self, k):
+        return self._edge_point(k, 0)
+
+
+    def get_edge_end(self, k):
+        return self._edge_point(k, 4 if self.add_tips else 3)
+
+
+    def get_edge_starts(self):
+        self._sync_points()
+        return self.edge_points[:, 0].copy()
+
+
+    def get_edge_ends(self):
+        self._sync_points()
+        return self.edge_points[:, 4 if self.add_tips else 3].copy()
+
+
+    def set_edge_styles(self, rgbas=None, widths=None):
+        '''Restyle every edge at once from ``(num_edges, 4)`` rgbas and/or ``(num_edges,)`` widths.'''
+        if rgbas is not None:
+            self.edge_rgbas = np.broadcast_to(rgbas, self.edge_rgbas.shape).astype(float)
+        if widths is not None:
+            self.edge_widths = np.broadcast_to(widths, self.edge_widths.shape).astype(float)
+        return self.rebuild()
+
+
+    def set_edge_style(self, indices, color=None, width=None, opacity=None):
+        '''Restyle only the edges in ``indices``.'''
+        if color is not None:
+            rgba = color_to_rgba(color)
+            self.edge_rgbas[indices, :3] = rgba[:3]
+        if opacity is not None:
+            self.edge_rgbas[indices, 3] = opacity
+        if width is not None:
+            self.edge_widths[indices] = width
+        return self.rebuild()
+
+
+    def highlight_edges(self, indices, color=YELLOW, width=2):
+        return self.set_edge_style(indices, color=color, width=width)
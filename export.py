@@ -0,0 +1,281 @@
+'''Export a network scene as SVG keyframes and a JSON timeline, without rendering video.
+
+The scene is played as in `dryrun` (animations skipped, no LaTeX or Pango, text
+replaced by `dryrun.StubText`) and after every ``play`` the mobjects on screen are
+written as one SVG: every VMobject becomes a ``<path>`` built from its cubic
+beziers, every label a ``<text>`` with its value. Consecutive identical keyframes
+share a file. ``timeline.json`` lists the keyframes with their start, run time,
+animations and SVG, plus the labels that appeared, changed or disappeared, so a
+browser can play the values over a single still.
+
+    python export.py                                         # NeuralNetworkVisualisation, into export/
+    python export.py --module medium --scene TestNetwork -o export/medium
+    python export.py --still --size 4x16x2 -o diagram        # network and connections only, one SVG
+
+Nothing is rasterized and ffmpeg never runs; a small network exports in a
+fraction of a second.
+'''
+import argparse
+import importlib
+import json
+import os
+import time
+
+from manim import *
+from manim.mobject.geometry import labeled
+from manim.mobject.text import numbers
+
+import network
+from dryrun import SCENES, dry_run, stubbed_text
+from labels import NumberLabelGroup
+from parallel_render import QUALITIES
+from scene import LAYER_SIZES, NeuralNetworkVisualisation
+from sizes import parse_size
+
+
+# SVG user units per manim unit.
+SVG_SCALE = 100
+# Decimals of the coordinates written to the SVG files.
+SVG_PRECISION = 2
+
+
+def _hex(rgb):
+    return '#' + ''.join(f'{int(round(channel * 255)):02x}' for channel in np.clip(rgb[:3], 0, 1))
+
+
+def _paint(rgbas):
+    '''``(color, opacity)`` of the first of ``rgbas``, None when invisible.'''
+    if len(rgbas) == 0 or rgbas[0][3] <= 0:
+        return None
+    return _hex(rgbas[0]), float(rgbas[0][3])
+
+
+def label_text(mobject):
+    '''Text shown by ``mobject`` if it is a label, else None.'''
+    if isinstance(mobject, DecimalNumber):
+        return str(int(mobject.get_value())) if isinstance(mobject, Integer) else f'{mobject.get_value():.{mobject.num_decimal_places}f}'
+    for attribute in ('text', 'tex_string'):
+        text = getattr(mobject, attribute, None)
+        if isinstance(text, str) and text:
+            return text
+    return None
+
+
+class SVGWriter:
+    '''Writes mobjects as SVG documents covering the camera frame.'''
+
+    def __init__(self, scale=SVG_SCALE, precision=SVG_PRECISION):
+        self.scale      = scale
+        self.precision  = precision
+        self.width      = config.frame_width * scale
+        self.height     = config.frame_height * scale
+        self.background = _hex(color_to_rgb(config.background_color))
+
+
+    def to_svg(self, points):
+        '''``(n, 2)`` SVG coordinates of manim points: origin top left, y down.'''
+        return np.column_stack([
+            (points[:, 0] + config.frame_width / 2) * self.scale,
+            (config.frame_height / 2 - points[:, 1]) * self.scale,
+        ])
+
+
+    def path_data(self, vmobject):
+        p = self.precision
+        parts = []
+        for subpath in vmobject.get_subpaths():
+            if len(subpath) < 4:
+                continue
+            xy = self.to_svg(subpath)
+            parts.append(f'M{xy[0, 0]:.{p}f} {xy[0, 1]:.{p}f}')
+            for curve in xy[:len(xy) // 4 * 4].reshape(-1, 4, 2)[:, 1:].reshape(-1, 6):
+                parts.append('C' + ' '.join(f'{value:.{p}f}' for value in curve))
+            if np.allclose(subpath[0], subpath[-1]):
+                parts.append('Z')
+        return ''.join(parts)
+
+
+    def path(self, vmobject):
+        data = self.path_data(vmobject)
+        if not data:
+            return None
+        fill = _paint(vmobject.get_fill_rgbas())
+        stroke = _paint(vmobject.get_stroke_rgbas()) if vmobject.get_stroke_width() > 0 else None
+        if fill is None and stroke is None:
+            return None
+
+        attributes = [f'd="{data}"']
+        attributes.append(f'fill="{fill[0]}" fill-opacity="{fill[1]:.3g}"' if fill else 'fill="none"')
+        if stroke:
+            #-- manim's stroke widths are in hundredths of a unit
+            width = vmobject.get_stroke_width() * 0.01 * self.scale
+            attributes.append(f'stroke="{stroke[0]}" stroke-opacity="{stroke[1]:.3g}" stroke-width="{width:.3g}"')
+        return f'<path {" ".join(attributes)}/>'
+
+
+    def text(self, text, mobject):
+        x, y = self.to_svg(mobject.get_center()[None])[0]
+        color = _paint(mobject.get_fill_rgbas()) if isinstance(mobject, VMobject) else None
+        size = max(mobject.height, 1e-3) * self.scale
+        escaped = str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        return (
+            f'<text x="{x:.{self.precision}f}" y="{y:.{self.precision}f}" font-size="{size:.3g}" '
+            f'fill="{color[0] if color else "#ffffff"}" text-anchor="middle" dominant-baseline="central">{escaped}</text>'
+        )
+
+
+    def elements(self, mobjects, texts=None):
+        '''SVG elements of ``mobjects`` in drawing order; labels are added to ``texts`` by id.'''
+        elements = []
+        def walk(mobject):
+            if isinstance(mobject, NumberLabelGroup):
+                for k, label in enumerate(mobject):
+                    elements.append(self.text(mobject.texts[k], label))
+                    if texts is not None:
+                        texts[id(label)] = (mobject.texts[k], label)
+                return
+            text = label_text(mobject)
+            if text is not None:
+                elements.append(self.text(text, mobject))
+                if texts is not None:
+                    texts[id(mobject)] = (text, mobject)
+                return
+            if isinstance(mobject, VMobject) and len(mobject.points):
+                element = self.path(mobject)
+                if element is not None:
+                    elements.append(element)
+            for submobject in mobject.submobjects:
+                walk(submobject)
+
+        for mobject in mobjects:
+            walk(mobject)
+        return elements
+
+
+    def document(self, elements):
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {self.width:g} {self.height:g}" '
+            f'width="{self.width:g}" height="{self.height:g}">\n'
+            f'<rect width="100%" height="100%" fill="{self.background}"/>\n'
+            + '\n'.join(elements)
+            + '\n</svg>\n'
+        )
+
+
+class TimelineExporter:
+    '''``on_play`` hook for `dryrun.dry_run` that writes a keyframe after every ``play``.'''
+
+    def __init__(self, output_dir, writer=None):
+        self.output_dir = output_dir
+        self.writer     = writer
+        self.keyframes  = []
+        self._last_svg  = None
+        self._file      = None
+        self._labels    = {}
+        self._label_ids = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+
+    def label_id(self, key):
+        '''Small stable id of a label for the timeline.'''
+        return self._label_ids.setdefault(key, len(self._label_ids))
+
+
+    def __call__(self, scene, entry):
+        if self.writer is None:
+            self.writer = SVGWriter()
+        texts = {}
+        svg = self.writer.document(self.writer.elements(scene.mobjects + scene.foreground_mobjects, texts))
+
+        if svg != self._last_svg:
+            self._file = f'keyframe_{len(self.keyframes):04d}.svg'
+            with open(os.path.join(self.output_dir, self._file), 'w') as file:
+                file.write(svg)
+            self._last_svg = svg
+
+        #-- labels are compared by value and position, so moved labels count as changed
+        labels = {}
+        for key, (text, mobject) in texts.items():
+            x, y = self.writer.to_svg(mobject.get_center()[None])[0]
+            labels[self.label_id(key)] = [str(text), round(float(x), 1), round(float(y), 1)]
+        changed = {k: value for k, value in labels.items() if self._labels.get(k) != value}
+        removed = sorted(set(self._labels) - set(labels))
+        self._labels = labels
+
+        self.keyframes.append({
+            'start'      : round(entry['start'], 4),
+            'run_time'   : round(entry['run_time'], 4),
+            'animations' : entry['animations'],
+            'svg'        : self._file,
+            'labels'     : changed,
+            'removed'    : removed,
+        })
+
+
+    def write_timeline(self, scene_name):
+        timeline = {
+            'scene'     : scene_name,
+            'width'     : self.writer.width if self.writer else None,
+            'height'    : self.writer.height if self.writer else None,
+            'keyframes' : self.keyframes,
+        }
+        path = os.path.join(self.output_dir, 'timeline.json')
+        with open(path, 'w') as file:
+            json.dump(timeline, file, separators=(',', ':'))
+        return path
+
+
+def export_scene(scene_cls, output_dir, quality='low_quality'):
+    '''Write the keyframes of ``scene_cls`` and their timeline to ``output_dir``; returns the dry run report.'''
+    exporter = TimelineExporter(output_dir)
+    report = dry_run(scene_cls, quality, on_play=exporter)
+    report['timeline_file'] = exporter.write_timeline(report['scene'])
+    report['svg_files'] = len({keyframe['svg'] for keyframe in exporter.keyframes})
+    return report
+
+
+def export_network(layer_sizes, path, seed=0):
+    '''Write one SVG of the network of `scene.NeuralNetworkVisualisation` and its connections.'''
+    scene_cls = type('Export', (NeuralNetworkVisualisation,), {'layer_sizes': layer_sizes, 'seed': seed})
+    model = scene_cls.build_model()
+    with stubbed_text({network, labeled, numbers}):
+        mobject = network.NetworkMobject(model.layer_sizes, style='scene', lod=scene_cls.lod, max_width=config.frame_width - 1, max_height=config.frame_height - 0.5)
+        mobject.create_connections(model.weight_entries, model.connected_entries)
+        writer = SVGWriter()
+        svg = writer.document(writer.elements([mobject, mobject.connections]))
+    with open(path, 'w') as file:
+        file.write(svg)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default=None, help='module of --scene (default: scene, then medium)')
+    parser.add_argument('--scene', default='NeuralNetworkVisualisation')
+    parser.add_argument('--size', default=None, help='inputs x hidden width x hidden layers, for scenes with `layer_sizes`')
+    parser.add_argument('--still', action='store_true', help='only the network and its connections, as one SVG')
+    parser.add_argument('-q', '--quality', choices=QUALITIES, default='l')
+    parser.add_argument('-o', '--output', default='export', help='output directory (SVG file with --still)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.still:
+        path = args.output if args.output.endswith('.svg') else args.output + '.svg'
+        export_network(parse_size(args.size) if args.size else LAYER_SIZES, path)
+        print(f"wrote {path} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return
+
+    module = args.module
+    if module is None:
+        module = next(name for name, _ in SCENES if hasattr(importlib.import_module(name), args.scene))
+    scene_cls = getattr(importlib.import_module(module), args.scene)
+    if args.size is not None and hasattr(scene_cls, 'layer_sizes'):
+        scene_cls = type(args.scene, (scene_cls,), {'layer_sizes': parse_size(args.size)})
+
+    report = export_scene(scene_cls, args.output, QUALITIES[args.quality])
+    print(f"wrote {report['svg_files']} SVG keyframes for {report['plays']} play calls and "
+          f"{report['timeline_file']} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
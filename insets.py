@@ -0,0 +1,103 @@
+'''Inset plot of a layer's activation function with its neurons marked on the curve.
+
+The curve of every activation is sampled and built into a mobject once, in a unit
+box; each `ActivationInset` copies and stretches that prototype, so drawing an
+inset for every layer (or every stage) never evaluates or builds a curve again.
+'''
+from manim import *
+
+from activations import get_activation
+from labels import label_factory
+
+
+# Points sampled along an activation curve.
+CURVE_SAMPLES = 64
+
+_curves = {}
+
+
+def curve_prototype(activation):
+    '''``(curve, y_range)`` of an elementwise activation; the curve fills a unit box centered on the origin.'''
+    activation = get_activation(activation)
+    if activation.name not in _curves:
+        x = np.linspace(*activation.x_range, CURVE_SAMPLES)
+        y = activation(x)
+        y_min, y_max = float(y.min()), float(y.max())
+        if y_max - y_min < 1e-6:
+            y_min, y_max = y_min - 1, y_max + 1
+        x_min, x_max = activation.x_range
+        points = np.column_stack([
+            (x - x_min) / (x_max - x_min) - 0.5,
+            (y - y_min) / (y_max - y_min) - 0.5,
+            np.zeros_like(x),
+        ])
+        curve = VMobject(stroke_color=YELLOW, stroke_width=2)
+        curve.set_points_as_corners(points)
+        _curves[activation.name] = (curve, (y_min, y_max))
+    return _curves[activation.name]
+
+
+class ActivationInset(VGroup):
+    '''Framed plot of ``activation`` with one dot per neuron at ``(z, f(z))``.
+
+    ``activations`` are the neurons' outputs; they are computed from
+    ``pre_activations`` when not given, which is only right for elementwise
+    functions. Softmax has no curve: its dots are placed on a ``[0, 1]`` output axis.
+    Points outside the plotted range are clamped to its border.
+    '''
+
+    def __init__(
+        self,
+        activation,
+        pre_activations,
+        activations = None,
+        width       = 1.2,
+        height      = 0.8,
+        dot_radius  = 0.03,
+        dot_color   = WHITE,
+        font_size   = 12,
+        **kwargs,
+        ):
+        super().__init__(**kwargs)
+        self.activation = get_activation(activation)
+        pre_activations = np.asarray(pre_activations, dtype=float)
+        if activations is None:
+            activations = self.activation(pre_activations)
+
+        if self.activation.elementwise:
+            prototype, self.y_range = curve_prototype(self.activation)
+            self.x_range = self.activation.x_range
+            curve = prototype.copy().stretch(width, 0).stretch(height, 1)
+        else:
+            self.x_range = (float(pre_activations.min()) - 1, float(pre_activations.max()) + 1)
+            self.y_range = (0, 1)
+            curve = VMobject()
+
+        self.frame = Rectangle(width=width, height=height, stroke_color=GREY, stroke_width=1)
+        self.curve = curve
+        self.dots = VGroup(*[
+            Dot(self.point(z, a), radius=dot_radius, color=dot_color)
+            for z, a in zip(pre_activations, np.asarray(activations, dtype=float))
+        ])
+        title = label_factory.get(self.activation.name, font_size)
+        title.next_to(self.frame, UP, buff=0.05)
+        self.add(self.frame, self.axes(), self.curve, self.dots, title)
+
+
+    def point(self, z, a):
+        '''Position of ``(z, a)`` in the plot.'''
+        (x_min, x_max), (y_min, y_max) = self.x_range, self.y_range
+        u = np.clip((z - x_min) / (x_max - x_min), 0, 1) - 0.5
+        v = np.clip((a - y_min) / (y_max - y_min), 0, 1) - 0.5
+        return self.frame.get_center() + u * self.frame.width * RIGHT + v * self.frame.height * UP
+
+
+    def axes(self):
+        '''The ``z = 0`` and ``f = 0`` lines, where they fall inside the plot.'''
+        axes = VGroup()
+        (x_min, x_max), (y_min, y_max) = self.x_range, self.y_range
+        if x_min < 0 < x_max:
+            axes.add(Line(self.point(0, y_min), self.point(0, y_max), stroke_color=GREY, stroke_width=1))
+        if y_min < 0 < y_max:
+            axes.add(Line(self.point(x_min, 0), self.point(x_max, 0), stroke_color=GREY, stroke_width=1))
+        return axes
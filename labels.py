@@ -0,0 +1,234 @@
+from collections import OrderedDict
+
+from manim import *
+
+from tex_batch import TexBatch
+
+
+class LabelFactory:
+    '''Hands out copies of ``Text``/``MathTex``/``Tex`` mobjects from an LRU cache.
+
+    Building a text mobject goes through Pango (``Text``) or LaTeX (``MathTex``,
+    ``Tex``) and SVG parsing, while copying an existing one only duplicates its
+    points. Values shown by the scenes are rounded to two decimals, so a small
+    cache of prototypes keyed by ``(string, font_size, class)`` covers almost
+    every label of a dense network.
+
+    TeX labels declared with `prefetch` are compiled together by ``tex_batch``
+    (a `tex_batch.TexBatch`) when the first TeX label is built; set it to None to
+    let manim compile every expression on its own.
+    '''
+
+    def __init__(self, maxsize=4096, tex_batch=None):
+        self.maxsize   = maxsize
+        self.tex_batch = tex_batch
+        self.hits      = 0
+        self.misses    = 0
+        self._cache    = OrderedDict()
+
+
+    def get(self, text, font_size, cls=Text, **kwargs):
+        key = (text, font_size, cls, tuple(sorted(kwargs.items())))
+        prototype = self._cache.get(key)
+
+        if prototype is None:
+            self.misses += 1
+            if self.tex_batch is not None:
+                self.tex_batch.ensure(text, cls)
+            prototype = cls(text, font_size=font_size, **kwargs)
+            self._cache[key] = prototype
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+
+        return prototype.copy()
+
+
+    def prefetch(self, labels):
+        '''Declare labels, as ``(text, cls)`` pairs, that are about to be built.'''
+        if self.tex_batch is None:
+            return
+        for text, cls in labels:
+            self.tex_batch.add(text, cls)
+
+
+    def clear(self):
+        self._cache.clear()
+        self.hits   = 0
+        self.misses = 0
+
+
+    def __len__(self):
+        return len(self._cache)
+
+
+label_factory = LabelFactory(tex_batch=TexBatch())
+
+
+def format_value(value):
+    return str(round(float(value), 2))
+
+
+def value_label(value, font_size=12):
+    '''Label showing ``value`` rounded to two decimals.'''
+    return label_factory.get(format_value(value), font_size)
+
+
+# Cell width of the narrow characters, relative to the width of a digit.
+CHAR_WIDTHS = {'.': 0.5, ',': 0.5, '-': 0.8, '*': 0.8}
+
+
+class GlyphAtlas:
+    '''Single-character glyph prototypes of one font size and the grid they are laid out on.'''
+
+    def __init__(self, font_size=12, factory=label_factory):
+        self.font_size = font_size
+        self.factory   = factory
+
+        digits = [factory.get(digit, font_size) for digit in '0123456789']
+        self.advance      = max(digit.width for digit in digits) * 1.15
+        self.digit_height = max(digit.height for digit in digits)
+
+
+    def _widths(self, text):
+        return np.array([CHAR_WIDTHS.get(char, 1.0) for char in text]) * self.advance
+
+
+    def width(self, text):
+        return self._widths(text).sum()
+
+
+    def cells(self, text, origin):
+        '''Center of every character's cell for ``text`` starting at ``origin`` (left edge).'''
+        widths = self._widths(text)
+        offsets = np.cumsum(widths) - widths / 2
+        return np.asarray(origin) + offsets[:, None] * RIGHT
+
+
+    def glyph(self, char, cell):
+        glyph = self.factory.get(char, self.font_size)
+        glyph.move_to(cell)
+        if char in '.,':
+            glyph.align_to(cell + DOWN * self.digit_height / 2, DOWN)
+        return glyph
+
+
+_atlases = {}
+
+
+def get_atlas(font_size=12):
+    if font_size not in _atlases:
+        _atlases[font_size] = GlyphAtlas(font_size)
+    return _atlases[font_size]
+
+
+def clear_caches():
+    '''Forget every label prototype and glyph atlas, so the next labels are built from scratch.'''
+    label_factory.clear()
+    _atlases.clear()
+
+
+class _LabelTransition(AnimationGroup):
+    '''Animation returned by `NumberLabelGroup.transition_to`; drops faded glyphs when done.'''
+
+    def __init__(self, labels, *animations, **kwargs):
+        self.labels = labels
+        super().__init__(*animations, **kwargs)
+
+
+    def clean_up_from_scene(self, scene):
+        super().clean_up_from_scene(scene)
+        self.labels.drop_faded_glyphs()
+
+
+class NumberLabelGroup(VGroup):
+    '''A batch of short numeric labels built from shared glyphs and updatable in place.
+
+    Label ``k`` is the VGroup ``self[k]`` with one glyph per character of ``texts[k]``;
+    the initial texts are centered on ``anchors[k]`` and later texts keep the same
+    left edge, so a shared prefix stays put. Like ``DecimalNumber``, but for a whole
+    layer at once: `set_texts` and `transition_to` only touch the glyphs whose
+    character or position actually changes.
+    '''
+
+    def __init__(self, texts, anchors, font_size=12, atlas=None, **kwargs):
+        super().__init__(**kwargs)
+        self.atlas   = atlas if atlas is not None else get_atlas(font_size)
+        self.texts   = list(texts)
+        self.origins = np.array(anchors, dtype=float).reshape(-1, 3)
+        self.origins -= np.array([self.atlas.width(text) / 2 for text in self.texts])[:, None] * RIGHT
+        self._faded  = []
+
+        for text, origin in zip(self.texts, self.origins):
+            cells = self.atlas.cells(text, origin)
+            self.add(VGroup(*[self.atlas.glyph(char, cell) for char, cell in zip(text, cells)]))
+
+
+    def _diff(self, k, text):
+        '''``(glyphs, changes, removed)`` to go from label ``k``'s text to ``text``.
+
+        ``changes`` holds ``(position, glyph or None, target)`` for every character
+        that needs a new glyph; unchanged characters keep theirs.
+        '''
+        old_text = self.texts[k]
+        old_cells = self.atlas.cells(old_text, self.origins[k])
+        new_cells = self.atlas.cells(text, self.origins[k])
+        old_glyphs = list(self[k].submobjects)
+
+        glyphs, changes = [], []
+        for p, (char, cell) in enumerate(zip(text, new_cells)):
+            if p < len(old_text) and old_text[p] == char and np.allclose(old_cells[p], cell):
+                glyphs.append(old_glyphs[p])
+                continue
+            target = self.atlas.glyph(char, cell)
+            glyph = old_glyphs[p] if p < len(old_glyphs) else None
+            glyphs.append(glyph if glyph is not None else target)
+            changes.append((p, glyph, target))
+
+        return glyphs, changes, old_glyphs[len(text):]
+
+
+    def set_texts(self, texts):
+        '''Change the displayed texts without animating; returns the changed label indices.'''
+        changed = []
+        for k, text in enumerate(texts):
+            if text == self.texts[k]:
+                continue
+            glyphs, changes, _ = self._diff(k, text)
+            for p, glyph, target in changes:
+                if glyph is not None:
+                    glyph.become(target)
+            self[k].submobjects = glyphs
+            self.texts[k] = text
+            changed.append(k)
+        return changed
+
+
+    def transition_to(self, texts, run_time=1, **kwargs):
+        '''Animation morphing the labels to ``texts``, touching only the changed glyphs.'''
+        animations = []
+        for k, text in enumerate(texts):
+            if text == self.texts[k]:
+                continue
+            glyphs, changes, removed = self._diff(k, text)
+            for p, glyph, target in changes:
+                animations.append(Transform(glyph, target) if glyph is not None else FadeIn(target))
+            for glyph in removed:
+                animations.append(glyph.animate.set_opacity(0))
+                self._faded.append((k, glyph))
+            #-- faded glyphs stay drawn until the transition is cleaned up
+            self[k].submobjects = glyphs + removed
+            self.texts[k] = text
+
+        if not animations:
+            animations.append(Wait(run_time))
+        return _LabelTransition(self, *animations, run_time=run_time, **kwargs)
+
+
+    def drop_faded_glyphs(self):
+        for k, glyph in self._faded:
+            if glyph in self[k].submobjects:
+                self[k].remove(glyph)
+        self._faded = []
@@ -0,0 +1,104 @@
+'''Vectorized layout of a layered network.
+
+The coordinates the scenes need (node centers, edge endpoints and the anchor
+points of edge labels) are computed for the whole network as NumPy arrays in a
+single pass. Mobjects are then placed from these arrays: one move per node inside
+a layer, one shift per layer and one `EdgeBundle` per layer pair, instead of
+arranging VGroups and querying ``get_right()``/``get_left()`` for every node pair.
+'''
+import numpy as np
+
+from manim import DOWN, ORIGIN, RIGHT
+
+
+# Fraction of the way along an edge where its label is anchored.
+LABEL_POSITION = 0.25
+
+
+def stack_offsets(sizes, buff):
+    '''Center offsets of items of the given ``sizes`` laid end to end with ``buff`` gaps.
+
+    Offsets are measured along the stacking direction from the center of the whole
+    stack, which is what `VGroup.arrange` produces.
+    '''
+    sizes = np.asarray(sizes, dtype=float)
+    if len(sizes) == 0:
+        return sizes
+    ends = np.cumsum(sizes + buff) - buff
+    return ends - sizes / 2 - ends[-1] / 2
+
+
+def stack_centers(sizes, buff, direction=DOWN):
+    '''``(n, 3)`` centers of items stacked along ``direction``, centered on the origin.'''
+    return stack_offsets(sizes, buff)[:, None] * np.asarray(direction, dtype=float)
+
+
+def label_anchors(starts, ends, position=LABEL_POSITION):
+    '''Points ``position`` of the way from ``starts`` to ``ends``.'''
+    return starts + position * (ends - starts)
+
+
+class NetworkLayout:
+    '''Coordinates of every node of a network and of the edges between its layers.
+
+    Parameters
+    ----------
+    node_centers: list[np.ndarray]
+        ``(k_l, 3)`` centers of the node mobjects of each layer, relative to the
+        origin the layer was built around
+    half_widths: list[np.ndarray]
+        ``(k_l,)`` half widths of those nodes
+    layer_boxes: np.ndarray
+        ``(L, 2, 3)`` lower left and upper right corners of every layer's bounding
+        box (titles and labels included), relative to the same origins
+    layer_buff: float
+        Horizontal gap between the bounding boxes of consecutive layers
+    max_width: float
+        The network is scaled down about its center to fit this width
+    max_height: float
+        ... and this height (the tallest layer box, titles included)
+
+    The layers are placed side by side and centered on the origin, like
+    ``arrange(RIGHT)`` followed by ``scale_to_fit_width`` would.
+    '''
+
+    def __init__(self, node_centers, half_widths, layer_boxes, layer_buff=1.5, max_width=None, max_height=None):
+        layer_boxes = np.asarray(layer_boxes, dtype=float).reshape(-1, 2, 3)
+        widths = layer_boxes[:, 1, 0] - layer_boxes[:, 0, 0]
+        total_width = widths.sum() + layer_buff * (len(widths) - 1)
+        total_height = (layer_boxes[:, 1, 1] - layer_boxes[:, 0, 1]).max(initial=0)
+
+        self.shifts = stack_centers(widths, layer_buff, RIGHT) - layer_boxes.mean(axis=1)
+        self.scale = 1.0
+        if max_width is not None and total_width > max_width:
+            self.scale = max_width / total_width
+        if max_height is not None and total_height > max_height:
+            self.scale = min(self.scale, max_height / total_height)
+
+        self.node_centers = [self.scale * (np.reshape(centers, (-1, 3)) + shift) for centers, shift in zip(node_centers, self.shifts)]
+        self.half_widths  = [self.scale * np.asarray(widths, dtype=float) for widths in half_widths]
+        self.node_lefts   = [centers - widths[:, None] * RIGHT for centers, widths in zip(self.node_centers, self.half_widths)]
+        self.node_rights  = [centers + widths[:, None] * RIGHT for centers, widths in zip(self.node_centers, self.half_widths)]
+
+
+    @property
+    def num_layers(self):
+        return len(self.node_centers)
+
+
+    def edge_endpoints(self, layer_idx, sources, targets):
+        '''``(starts, ends)`` of the edges from nodes ``sources`` of layer ``layer_idx`` to nodes ``targets`` of the next.'''
+        return self.node_rights[layer_idx][sources], self.node_lefts[layer_idx+1][targets]
+
+
+    def edge_anchors(self, layer_idx, sources, targets, position=LABEL_POSITION):
+        '''Label anchor of every edge, ``position`` of the way along it.'''
+        return label_anchors(*self.edge_endpoints(layer_idx, sources, targets), position)
+
+
+    def apply(self, layers):
+        '''Move every layer mobject to its place: one shift per layer, then the common scale.'''
+        for layer, shift in zip(layers, self.shifts):
+            layer.shift(shift)
+            if self.scale != 1:
+                layer.scale(self.scale, about_point=ORIGIN)
@@ -0,0 +1,321 @@
+'''Memory-mapped access to trained weights stored in .npy, .npz or .safetensors files.
+
+Tensors are never loaded as a whole: `CheckpointReader` maps them straight from
+the file. Building the model runs one forward pass (as does `NetworkModel.fingerprint`
+when a render cache asks for it), which reads every weight once from the mapped
+pages without copying the matrix; BF16 tensors are wrapped in a `BFloat16Matrix`
+and widened to float32 a block of rows at a time. After that, only the slices a
+scene displays are read.
+
+    model = load_model('mlp.safetensors')
+    model = load_model('mlp.npz', layers=[('fc1.weight', 'fc1.bias'), ('fc2.weight', 'fc2.bias')])
+'''
+import json
+import re
+import struct
+import zipfile
+
+import numpy as np
+
+from model import NetworkModel
+from sparse import SparseWeights
+
+
+SAFETENSORS_DTYPES = {
+    'F64'  : np.float64,
+    'F32'  : np.float32,
+    'F16'  : np.float16,
+    'BF16' : np.uint16,    # converted to float32 when read
+    'I64'  : np.int64,
+    'I32'  : np.int32,
+    'I16'  : np.int16,
+    'I8'   : np.int8,
+    'U8'   : np.uint8,
+    'BOOL' : np.bool_,
+}
+
+
+class CheckpointReader:
+    '''Read-only, memory-mapped view of the tensors in a weight file.'''
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._bfloat16 = set()
+        self._compressed = set()
+
+        if self.path.endswith('.npy'):
+            self._tensors = {'arr_0': np.load(self.path, mmap_mode='r')}
+        elif self.path.endswith('.npz'):
+            self._tensors = self._map_npz()
+        elif self.path.endswith('.safetensors'):
+            self._tensors = self._map_safetensors()
+        else:
+            raise ValueError(f"Unsupported weight file `{self.path}`.")
+
+
+    def _map_npz(self):
+        tensors = {}
+        with zipfile.ZipFile(self.path) as archive, open(self.path, 'rb') as file:
+            for info in archive.infolist():
+                name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+
+                #-- compressed members cannot be mapped; they are loaded on first access
+                if info.compress_type != zipfile.ZIP_STORED:
+                    self._compressed.add(name)
+                    tensors[name] = None
+                    continue
+
+                file.seek(info.header_offset)
+                local_header = file.read(30)
+                name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+                file.seek(info.header_offset + 30 + name_length + extra_length)
+
+                version = np.lib.format.read_magic(file)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+
+                tensors[name] = np.memmap(
+                    self.path,
+                    dtype  = dtype,
+                    mode   = 'r',
+                    offset = file.tell(),
+                    shape  = shape,
+                    order  = 'F' if fortran_order else 'C',
+                )
+        return tensors
+
+
+    def _map_safetensors(self):
+        with open(self.path, 'rb') as file:
+            header_length, = struct.unpack('<Q', file.read(8))
+            header = json.loads(file.read(header_length))
+
+        data_start = 8 + header_length
+        tensors = {}
+        for name, info in header.items():
+            if name == '__metadata__':
+                continue
+            if info['dtype'] not in SAFETENSORS_DTYPES:
+                raise TypeError(f"Unsupported safetensors dtype `{info['dtype']}` for `{name}`.")
+            if info['dtype'] == 'BF16':
+                self._bfloat16.add(name)
+
+            begin, _ = info['data_offsets']
+            tensors[name] = np.memmap(
+                self.path,
+                dtype  = SAFETENSORS_DTYPES[info['dtype']],
+                mode   = 'r',
+                offset = data_start + begin,
+                shape  = tuple(info['shape']),
+            )
+        return tensors
+
+
+    def keys(self):
+        return list(self._tensors)
+
+
+    def __contains__(self, name):
+        return name in self._tensors
+
+
+    def tensor(self, name):
+        '''The mapped tensor; nothing is read until it is indexed.'''
+        if name in self._compressed and self._tensors[name] is None:
+            with np.load(self.path) as archive:
+                self._tensors[name] = archive[name]
+        return self._tensors[name]
+
+
+    def read(self, name, index=Ellipsis):
+        '''``tensor(name)[index]`` as an in-memory floating point array.'''
+        values = np.asarray(self.tensor(name)[index])
+        if name in self._bfloat16:
+            return _widen_bfloat16(values)
+        return values
+
+
+def _widen_bfloat16(values):
+    return (np.asarray(values).astype(np.uint32) << 16).view(np.float32)
+
+
+class BFloat16Matrix:
+    '''Mapped BF16 matrix that is widened to float32 only where it is read.
+
+    Supports what `model.NetworkModel` does with its weights: ``shape``, ``T``,
+    indexing (blocks of rows, ``[rows, cols]`` entries) and ``a @ matrix``, which
+    goes through the rows ``block_rows`` at a time.
+    '''
+    # make ``ndarray @ BFloat16Matrix`` defer to `__rmatmul__`
+    __array_ufunc__ = None
+
+    def __init__(self, raw, block_rows=4096):
+        self.raw        = raw
+        self.block_rows = block_rows
+
+
+    @property
+    def shape(self):
+        return self.raw.shape
+
+
+    @property
+    def ndim(self):
+        return self.raw.ndim
+
+
+    @property
+    def T(self):
+        return BFloat16Matrix(self.raw.T, self.block_rows)
+
+
+    def __len__(self):
+        return len(self.raw)
+
+
+    def __getitem__(self, index):
+        return _widen_bfloat16(self.raw[index])
+
+
+    def __rmatmul__(self, a):
+        a = np.asarray(a, dtype=float)
+        out = np.zeros(a.shape[:-1] + (self.shape[1],))
+        for start in range(0, self.shape[0], self.block_rows):
+            out += a[..., start:start+self.block_rows] @ self[start:start+self.block_rows]
+        return out
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def discover_layers(reader):
+    '''``(weight, bias)`` key pairs of every 2d ``*weight`` tensor, in natural key order.
+
+    Files without named weights (a single ``.npy`` array, or ``np.savez(W1, b1, W2, ...)``
+    with its positional ``arr_N`` keys) are read positionally: every 2d tensor is a
+    layer and a 1d tensor right after it is that layer's bias.
+    '''
+    names = sorted(reader.keys(), key=_natural_key)
+    layers = []
+    for name in names:
+        if not name.endswith('weight') or reader.tensor(name).ndim != 2:
+            continue
+        bias = name[:-len('weight')] + 'bias'
+        layers.append((name, bias if bias in reader else None))
+    if layers:
+        return layers
+
+    for name in names:
+        ndim = reader.tensor(name).ndim
+        if ndim == 2:
+            layers.append((name, None))
+        elif ndim == 1 and layers and layers[-1][1] is None and names.index(layers[-1][0]) == names.index(name) - 1:
+            layers[-1] = (layers[-1][0], name)
+    return layers
+
+
+def _stored_transposed(shapes, bias_lengths, num_inputs=None):
+    '''Whether each weight matrix is stored ``(outputs, inputs)``, as PyTorch does.
+
+    Every layer is oriented so that consecutive widths agree: the outputs of a layer
+    are the inputs of the next one, a layer's outputs match its bias length (square
+    matrices with a bias are assumed to be PyTorch-style) and the first layer's
+    inputs match ``num_inputs`` when given. Layers the shapes leave open (square
+    ones) take the orientation of the others. Raises `ValueError` when no orientation
+    chains the layers, or when more than one does.
+    '''
+    def widths(l, flag):
+        return shapes[l][::-1] if flag else shapes[l]
+
+    allowed = []
+    for l, n_bias in enumerate(bias_lengths):
+        flags = [flag for flag in (False, True) if n_bias is None or widths(l, flag)[1] == n_bias]
+        if l == 0 and num_inputs is not None:
+            flags = [flag for flag in flags if widths(l, flag)[0] == num_inputs]
+        allowed.append(flags[-1:] if n_bias is not None else flags)
+
+    #-- orientations reachable from the first layer, then those that reach the last one
+    forward = [set(allowed[0])]
+    for l in range(1, len(shapes)):
+        forward.append({flag for flag in allowed[l] if any(widths(l-1, p)[1] == widths(l, flag)[0] for p in forward[-1])})
+    backward = [set(allowed[-1])]
+    for l in reversed(range(len(shapes) - 1)):
+        backward.insert(0, {flag for flag in allowed[l] if any(widths(l, flag)[1] == widths(l+1, n)[0] for n in backward[0])})
+
+    candidates = [reachable & reaching for reachable, reaching in zip(forward, backward)]
+    if not all(candidates):
+        raise ValueError(f"Weight shapes {[tuple(shape) for shape in shapes]} do not chain into a network in either orientation.")
+
+    #-- a file uses one convention: layers the shapes cannot decide (square ones) follow the others
+    resolved = {flag for flags in candidates if len(flags) == 1 for flag in flags}
+    convention = resolved.pop() if len(resolved) == 1 else None
+    transposed = [next(iter(flags)) if len(flags) == 1 else convention for flags in candidates]
+    chained = None not in transposed and all(widths(l, transposed[l])[1] == widths(l+1, transposed[l+1])[0] for l in range(len(shapes) - 1))
+    if not chained:
+        l = next(l for l, flags in enumerate(candidates) if len(flags) > 1)
+        raise ValueError(
+            f"Cannot tell whether weight {l} (shape {tuple(shapes[l])}) is stored (inputs, outputs) or "
+            f"(outputs, inputs); pass `transpose` or `inputs` to `load_model`."
+        )
+    return transposed
+
+
+def load_model(path, layers=None, inputs=None, transpose=None, rng=None, sparse=False, activations=None):
+    '''Build a `NetworkModel` whose weights are memory-mapped from ``path``.
+
+    Parameters
+    ----------
+    layers: list[tuple[str, str | None]]
+        ``(weight_key, bias_key)`` per layer, in order; discovered from the key
+        names (or their order, see `discover_layers`) when not given
+    inputs: np.ndarray
+        Input vector; drawn uniformly from [0, 1) with ``rng`` when not given
+    transpose: bool | None
+        Whether weights are stored ``(outputs, inputs)``. Inferred from the bias
+        lengths and the widths of neighbouring layers when ``None``, see
+        `_stored_transposed`
+    sparse: bool
+        Keep only the nonzero weights, as `sparse.SparseWeights`, for pruned
+        checkpoints. Each matrix is read once, a block of rows at a time
+    activations: str | list[str] | None
+        Activation of every layer, or one for all of them (see `activations`);
+        checkpoints do not record them, tanh is used when not given
+    '''
+    reader = CheckpointReader(path)
+    if layers is None:
+        layers = discover_layers(reader)
+    if not layers:
+        raise ValueError(f"No weight matrices found in `{path}`.")
+
+    read_biases = [reader.read(bias_key).astype(float) if bias_key is not None else None for _, bias_key in layers]
+    if transpose is None:
+        transposed = _stored_transposed(
+            [reader.tensor(weight_key).shape for weight_key, _ in layers],
+            [None if bias is None else len(bias) for bias in read_biases],
+            None if inputs is None else len(inputs),
+        )
+    else:
+        transposed = [transpose] * len(layers)
+
+    weights, biases = [], []
+    for (weight_key, _), bias, is_transposed in zip(layers, read_biases, transposed):
+        weight = reader.tensor(weight_key)
+        if weight_key in reader._bfloat16:
+            weight = BFloat16Matrix(weight)
+        if is_transposed:
+            weight = weight.T
+        if sparse:
+            weight = SparseWeights.from_dense(weight)
+        weights.append(weight)
+        biases.append(bias if bias is not None else np.zeros(weight.shape[1]))
+
+    if inputs is None:
+        if rng is None:
+            rng = np.random.default_rng()
+        inputs = rng.uniform(0, 1, size=weights[0].shape[0])
+
+    #-- a trained network's bias nodes output 1; the learned values live in `biases`
+    return NetworkModel(weights, biases, np.ones(len(weights)), inputs, activations)
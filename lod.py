@@ -0,0 +1,53 @@
+import numpy as np
+
+
+class LODPolicy:
+    '''Decides how much of a large network is actually drawn.
+
+    Layers with more than ``max_nodes`` neurons are collapsed to their first
+    ``head`` and last ``tail`` neurons with an ellipsis in between. Layer pairs
+    with more than ``max_edges`` drawable connections are either reduced to a
+    subset sampled with probability proportional to ``|w|`` (``edge_mode='sample'``)
+    or replaced by a single shaded band (``edge_mode='band'``).
+    '''
+
+    def __init__(self, max_nodes=10, head=3, tail=2, max_edges=200, edge_mode='sample', seed=0):
+        assert head + tail <= max_nodes
+        assert edge_mode in ('sample', 'band'), f"Unsupported edge mode `{edge_mode}`."
+
+        self.max_nodes = max_nodes
+        self.head      = head
+        self.tail      = tail
+        self.max_edges = max_edges
+        self.edge_mode = edge_mode
+        self.seed      = seed
+
+
+    def is_collapsed(self, num_neurons):
+        return num_neurons > self.max_nodes
+
+
+    def visible_neurons(self, num_neurons):
+        '''Indices of the neurons that get their own node mobject.'''
+        if not self.is_collapsed(num_neurons):
+            return np.arange(num_neurons)
+        return np.concatenate([np.arange(self.head), np.arange(num_neurons - self.tail, num_neurons)])
+
+
+    def use_band(self, num_edges):
+        return self.edge_mode == 'band' and num_edges > self.max_edges
+
+
+    def select_edges(self, weights):
+        '''Indices into the flat ``weights`` array of the edges that are drawn.'''
+        num_edges = len(weights)
+        if num_edges <= self.max_edges:
+            return np.arange(num_edges)
+
+        magnitude = np.abs(weights)
+        if np.count_nonzero(magnitude) <= self.max_edges:
+            return np.flatnonzero(magnitude)
+
+        rng = np.random.default_rng(self.seed)
+        p = magnitude / magnitude.sum()
+        return np.sort(rng.choice(num_edges, size=self.max_edges, replace=False, p=p))
@@ -1,7 +1,36 @@
 from manim import *
+import sys
+
+from edges import EdgeBundle
+from labels import label_factory
+from layout import label_anchors
+from network import build_layer, neuron_positions
+from profiling import attach_from_env
+from sparse import SparseWeights, is_sparse
+from streaming import renderer_from_env
+
+
+SEED = 0
+
 
 class TestNetwork(Scene):
+    seed = SEED
+
+    def __init__(self, renderer=None, camera_class=Camera, skip_animations=False, **kwargs):
+        if renderer is None:
+            renderer = renderer_from_env(camera_class=camera_class, skip_animations=skip_animations)
+        super().__init__(renderer=renderer, camera_class=camera_class, skip_animations=skip_animations, **kwargs)
+
+    def setup(self):
+        module = sys.modules[__name__]
+        self.profiler = attach_from_env(self, methods=(), functions=[
+            (module, 'generate_network_layer'),
+            (module, 'generate_layer_connections'),
+            (module, 'generate_random_labeled_layer_connections'),
+        ])
+
     def construct(self,):
+        rng = np.random.default_rng(self.seed)
  
         #--Constants and Stuff
         _shift_val = 4
@@ -57,11 +86,11 @@ class TestNetwork(Scene):
         self.play(Uncreate(input_hidden_arrows), Uncreate(hidden_output_arrows))
         self.wait()
  
-        labeled_input_hidden_arrows = generate_random_labeled_layer_connections(input_layer[0], hidden_layer[0], font_size=15, add_frame=True,)
+        labeled_input_hidden_arrows = generate_random_labeled_layer_connections(input_layer[0], hidden_layer[0], font_size=15, add_frame=True, rng=rng)
         self.play(*[GrowArrow(arrow) for arrow in labeled_input_hidden_arrows])
         self.wait(0.4)
  
-        labeled_hidden_output_arrows = generate_random_labeled_layer_connections(hidden_layer[0], output_layer[0], font_size=15, add_frame=True,)
+        labeled_hidden_output_arrows = generate_random_labeled_layer_connections(hidden_layer[0], output_layer[0], font_size=15, add_frame=True, rng=rng)
         self.play(*[GrowArrow(arrow) for arrow in labeled_hidden_output_arrows])
         self.wait()
 
@@ -79,139 +108,72 @@ def generate_network_layer(
     layer_idx       = None,
     shape_params:dict = {},
     ):
+    '''Layer drawn in this module's style; see `network.build_layer`.
+
+    Returns ``VGroup(nodes, layer_label, node_labels)`` where ``nodes`` is a
+    `network.LayerNodes` holding the regular nodes followed by the bias node.
+    '''
+    return build_layer(
+        num_nodes       = num_nodes,
+        include_bias    = include_bias,
+        layer_type      = layer_type,
+        style           = 'medium',
+        orientation     = orientation,
+        node_buffer     = node_buffer,
+        add_node_labels = add_node_labels,
+        font_size       = font_size,
+        add_layer_label = add_layer_label,
+        layer_font_size = layer_font_size,
+        layer_idx       = layer_idx,
+        shape_params    = shape_params,
+    )
+
+
+def layer_connection_pairs(source_layer:VGroup, target_layer:VGroup, weights=None):
+    '''Node positions ``(sources, targets)`` of every connection, grouped by target node.
+
+    Bias nodes of ``target_layer`` get no incoming connections. With
+    `sparse.SparseWeights` (indexed by node positions, like the dense ``weights``
+    of the labeled builders) only their stored entries are connections.
+    '''
+    if not is_sparse(weights):
+        targets, sources = np.meshgrid(neuron_positions(target_layer), np.arange(len(source_layer)), indexing='ij')
+        return sources.ravel(), targets.ravel()
+
+    sources, targets = weights.nonzero()
+    is_neuron = np.zeros(len(target_layer), dtype=bool)
+    is_neuron[neuron_positions(target_layer)] = True
+    keep = is_neuron[targets]
+    order = np.lexsort((sources[keep], targets[keep]))
+    return sources[keep][order], targets[keep][order]
+
+
+def layer_edge_endpoints(source_layer:VGroup, target_layer:VGroup, sources, targets):
+    '''``(starts, ends)`` arrays of the connections, from one right/left point per node.'''
+    rights = np.array([node.get_right() for node in source_layer])
+    lefts  = np.array([node.get_left() for node in target_layer])
+    return rights[sources], lefts[targets]
+
+
+def generate_layer_connections(source_layer:VGroup, target_layer:VGroup, arrow_width=2.5, weights=None):
+    '''source_layer and target_layer are both VGroups containing only nodes and bias
+
+    Only the stored connections of sparse ``weights`` are drawn, see `layer_connection_pairs`.
+    '''
+    sources, targets = layer_connection_pairs(source_layer, target_layer, weights)
+    starts, ends = layer_edge_endpoints(source_layer, target_layer, sources, targets)
+    return VGroup(*[Arrow(start, end, stroke_width=arrow_width) for start, end in zip(starts, ends)])
+
+
+def generate_layer_connection_bundle(source_layer:VGroup, target_layer:VGroup, arrow_width=2.5, weights=None):
+    '''Same connections as `generate_layer_connections`, drawn as a single `EdgeBundle`.
+
+    Edge ``k`` of the bundle corresponds to arrow ``k`` of `generate_layer_connections`.
+    '''
+    starts, ends = layer_edge_endpoints(source_layer, target_layer, *layer_connection_pairs(source_layer, target_layer, weights))
+    return EdgeBundle(starts, ends, stroke_width=arrow_width, tip_length=0.25, tip_width=0.25)
 
 
-    node_shape = None
-    if layer_type.lower() == 'input':
-        node_shape = Square
-        default_shape_params = {
-            'side_length'  : 1,
-            'fill_opacity' : 0.6,
-            'color'        : GREEN
-        }
-
-        shape_params = default_shape_params | shape_params
-
-    elif layer_type.lower() == 'hidden':
-        node_shape = Circle
-        default_shape_params = {
-            'radius'       : 0.6,
-            'fill_opacity' : 0.6,
-            'color'        : BLUE
-        }
-
-        shape_params = default_shape_params | shape_params
-
-    elif layer_type.lower() == 'output':
-        node_shape = Circle 
-        default_shape_params = {
-            'radius'       : 0.6,
-            'fill_opacity' : 0.6,
-            'color'        : BLUE
-        }
-
-        shape_params = default_shape_params | shape_params
-
-    else:
-        node_shape = Circle
-        default_shape_params = {
-            'radius'       : 0.6,
-            'fill_opacity' : 0.6,
-            'color'        : BLUE
-        }
-        
-        shape_params = default_shape_params | shape_params
-
-
-    layer_group = VGroup()  #this group will contain everything here to return
-
-    #-- Create regular nodes and add them to a group
-    layer_nodes = VGroup(*[node_shape(**shape_params) for i in range(num_nodes)])
-    
-    layer_group.add(layer_nodes)
-
-    #-- Create bias node and add it to the group
-    if include_bias:
-        bias_node = input_bias  = Circle(color=RED, fill_opacity=0.6, radius=0.35)
-        bias_node.is_bias_node = True   #add custom attribute to check layer
-        layer_nodes.add(bias_node)  #add temporarily here to make arrangement easier
-
-
-    #-- Arrange the nodes either in a vertical column or in a horizontal row
-    if orientation.lower() == 'horizontal' or orientation.lower() == 'h':
-        layer_nodes.arrange(LEFT, buff=node_buffer)
-    elif orientation.lower() == 'vertical' or orientation.lower() == 'v':
-        layer_nodes.arrange(DOWN, buff=node_buffer)
-
-
-    #-- remove bias node to make labeling simpler
-    if include_bias:
-        layer_nodes -= bias_node
-        #layer_group.add(bias_node)
-
-    #-- add main label to layer
-    if add_layer_label:
-        if layer_idx is None:
-            if layer_type.lower()[0] == 'i':
-                layer_idx=0
-            else:
-                layer_idx='n'
-            
-        layer_label = Tex(fr"{layer_type.capitalize()} Layer (\(L_{layer_idx}\))", font_size=layer_font_size)
-        layer_label.next_to(layer_nodes, UP, buff=0.25)
-
-        layer_group.add(layer_label)
-
-    #-- add labels to main nodes
-    if add_node_labels:
-        label_letter = layer_type.lower()[0]    #use the first letter of the layer type
-        node_labels = VGroup(*
-            [
-                Tex(
-                    fr"\({label_letter}_{i}\)", 
-                    font_size=font_size
-                )
-                for i in range(num_nodes)
-            ]           
-        )
-        
-        for label, node in zip(node_labels, layer_nodes):
-            label.move_to(node)
-
-        layer_group.add(node_labels)
-
-        if include_bias:
-            bias_label = Tex(r"b", font_size=font_size)
-            bias_label.move_to(bias_node)
-            layer_group.add(bias_label)
-
-    # add bias node back into the layer_nodes group
-    if include_bias:
-        layer_nodes.add(bias_node)
-
-
-    #-- Return the group containing all the nodes and labels
-    return layer_group
-
-
-def generate_layer_connections(source_layer:VGroup, target_layer:VGroup, arrow_width=2.5):
-    '''source_layer and target_layer are both VGroups containing only nodes and bias'''
-    arrow_group = VGroup() 
-
-    for j, target_node in enumerate(target_layer):
-        if hasattr(target_node,'is_bias_node'): #skip bias nodes for incoming arrows from previous layer
-            continue
-
-        for i, source_node in enumerate(source_layer):
-            arrow = Arrow(
-                source_layer[i].get_right(), 
-                target_layer[j].get_left(), 
-                stroke_width=arrow_width,
-            )
-            arrow_group.add(arrow)
-
-    return arrow_group
-
 def generate_random_labeled_layer_connections(
         source_layer:VGroup, 
         target_layer:VGroup, 
@@ -219,44 +181,81 @@ def generate_random_labeled_layer_connections(
         label_position=0.15, 
         font_size=10, 
         add_frame=True, 
-        weights:np.ndarray|list[list] = None):
+        weights:np.ndarray|list[list] = None,
+        rng:np.random.Generator = None):
     
     """
     
     Parameters
     ----------
-    weights: np.array | list[list]
-        A 2d array with shape = (len(source_layer) , len(target_layer))
+    weights: np.array | list[list] | SparseWeights
+        A 2d array with shape = (len(source_layer) , len(target_layer)); for
+        `sparse.SparseWeights` only the stored connections are drawn
+    rng: np.random.Generator
+        Generator used for random weights; seeded with `SEED` when not given
     """
     
     arrow_group = VGroup()
 
     if weights is None:
-        weights = np.random.uniform(-0.6, 0.6, size=(len(source_layer), len(target_layer)))
-    elif isinstance(weights, np.array):
+        if rng is None:
+            rng = np.random.default_rng(SEED)
+        weights = rng.uniform(-0.6, 0.6, size=(len(source_layer), len(target_layer)))
+    elif isinstance(weights, (np.ndarray, SparseWeights)):     # includes memory-mapped arrays, e.g. from loader.CheckpointReader
         assert(weights.shape == (len(source_layer), len(target_layer)))
     elif isinstance(weights, list):
         assert( (len(weights), len(weights[0])) == (len(source_layer), len(target_layer))    )
         weights = np.array(weights)
     else:
-        print(f"Unsupported type `{weights.type}` for 'weights'.")
+        print(f"Unsupported type `{type(weights).__name__}` for 'weights'.")
         raise TypeError
 
-    for j, target_node in enumerate(target_layer):
-        if hasattr(target_node, 'is_bias_node'):
-            continue 
-
-        for i, source_node in enumerate(source_layer):
-            arrow = LabeledArrow(
-                #label = f"{np.random.uniform(-0.6, 0.6):.2f}",
-                label = f"{weights[i,j]:.2f}",
-                label_position = label_position,
-                font_size = font_size,
-                label_frame = add_frame,
-                start = source_layer[i].get_right(),
-                end   = target_layer[j].get_left(),
-                stroke_width = arrow_width
-            )
-            arrow_group.add(arrow)
-
-    return arrow_group
\ No newline at end of file
+    sources, targets = layer_connection_pairs(source_layer, target_layer, weights)
+    starts, ends = layer_edge_endpoints(source_layer, target_layer, sources, targets)
+    for i, j, start, end in zip(sources, targets, starts, ends):
+        arrow = LabeledArrow(
+            #label = f"{np.random.uniform(-0.6, 0.6):.2f}",
+            label = f"{weights[i,j]:.2f}",
+            label_position = label_position,
+            font_size = font_size,
+            label_frame = add_frame,
+            start = start,
+            end   = end,
+            stroke_width = arrow_width
+        )
+        arrow_group.add(arrow)
+
+    return arrow_group
+
+
+def generate_random_labeled_layer_connection_bundle(
+        source_layer:VGroup, 
+        target_layer:VGroup, 
+        arrow_width=2.5, 
+        label_position=0.15, 
+        font_size=10, 
+        weights:np.ndarray|list[list] = None,
+        rng:np.random.Generator = None):
+    '''`EdgeBundle` version of `generate_random_labeled_layer_connections`.
+
+    Returns a VGroup of the bundle and a VGroup with one weight label per edge,
+    placed ``label_position`` of the way along it.
+    '''
+    if weights is None:
+        if rng is None:
+            rng = np.random.default_rng(SEED)
+        weights = rng.uniform(-0.6, 0.6, size=(len(source_layer), len(target_layer)))
+    if not is_sparse(weights):
+        weights = np.asarray(weights)
+    assert(weights.shape == (len(source_layer), len(target_layer)))
+
+    bundle = generate_layer_connection_bundle(source_layer, target_layer, arrow_width=arrow_width, weights=weights)
+    positions = label_anchors(bundle.get_edge_starts(), bundle.get_edge_ends(), label_position)
+
+    labels = VGroup()
+    for i, j, position in zip(*layer_connection_pairs(source_layer, target_layer, weights), positions):
+        label = label_factory.get(f"{weights[i,j]:.2f}", font_size)
+        label.move_to(position)
+        labels.add(label)
+
+    return VGroup(bundle, labels)
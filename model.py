@@ -0,0 +1,184 @@
+import hashlib
+
+import numpy as np
+
+from activations import layer_activations
+from sparse import SparseWeights, is_sparse
+
+
+def _as_float_array(values):
+    '''Floating point view of ``values``.
+
+    Float arrays (and memmaps) are kept as they are, and so are matrix-like objects
+    with their own ``__rmatmul__`` (`sparse.SparseWeights`, `loader.BFloat16Matrix`).
+    '''
+    if isinstance(values, np.ndarray):
+        return values if values.dtype.kind == 'f' else values.astype(float)
+    if hasattr(type(values), '__rmatmul__') and hasattr(values, 'shape'):
+        return values
+    return np.asarray(values, dtype=float)
+
+
+def _update_digest(digest, array, block_rows=4096):
+    '''Feed ``array`` to ``digest`` a block of rows at a time, so memmaps are never copied whole.'''
+    if np.ndim(array) == 0:
+        array = np.atleast_1d(array)
+    for start in range(0, len(array), block_rows):
+        digest.update(np.ascontiguousarray(array[start:start+block_rows]).tobytes())
+
+
+def propagate(inputs, weights, biases, bias_values, activation_functions, pre_activations=None):
+    '''Activations of every layer for one sample or an ``(N, inputs)`` batch, one matmul per layer.
+
+    The first entry is ``inputs`` itself. The pre-activations of the layers after the
+    first are appended to ``pre_activations`` when given.
+    '''
+    activations = [inputs]
+    a = inputs
+    for w, b, bias_value, activation in zip(weights, biases, bias_values, activation_functions):
+        z = a @ w + bias_value * b
+        a = activation(z)
+        if pre_activations is not None:
+            pre_activations.append(z)
+        activations.append(a)
+    return activations
+
+
+class NetworkModel:
+    '''Numeric state of a fully connected network with one bias node per non-output layer.
+
+    ``weights[l]`` has shape ``(layer_sizes[l], layer_sizes[l+1])`` and holds the weights
+    of the connections from the neurons of layer ``l`` to the neurons of layer ``l+1``.
+    ``biases[l]`` holds the weights leaving the bias node of layer ``l`` and
+    ``bias_values[l]`` is the value that bias node outputs. Layer ``l+1`` applies
+    ``activation_functions[l]`` (an `activations.Activation`, tanh unless
+    ``activations`` names others) to its pre-activations.
+
+    Every layer's pre-activations and activations are computed once, in a single
+    forward pass, and kept in ``pre_activations`` / ``activations`` so the scenes can
+    read them instead of recomputing. Weight matrices may be memory-mapped (see
+    `loader.load_model`); `weight_entries` reads a few of their entries without
+    materialising them. They may also be `sparse.SparseWeights`, for pruned networks:
+    the forward passes, `weight_entries` and `connected_entries` then only touch the
+    stored connections.
+    '''
+
+    def __init__(self, weights, biases, bias_values, inputs, activations=None):
+        self.weights     = [_as_float_array(w) for w in weights]
+        self.biases      = [np.asarray(b, dtype=float) for b in biases]
+        self.bias_values = np.asarray(bias_values, dtype=float)
+        self.inputs      = np.asarray(inputs, dtype=float)
+        self.activation_functions = layer_activations(activations, len(self.weights))
+
+        for l, (w, b) in enumerate(zip(self.weights, self.biases)):
+            assert w.shape == (self.layer_sizes[l], self.layer_sizes[l+1]), f"weights[{l}] has shape {w.shape}"
+            assert b.shape == (w.shape[1],), f"biases[{l}] has shape {b.shape}"
+        assert self.inputs.shape == (self.layer_sizes[0],)
+        assert self.bias_values.shape == (len(self.weights),)
+
+        self.forward()
+
+
+    @classmethod
+    def random(cls, layer_sizes, low=0, high=1, rng=None, density=None, activations=None):
+        '''Model with uniformly distributed inputs, weights and bias values.
+
+        With a ``density``, only that fraction of the connections between two
+        layers exists and the weights are `sparse.SparseWeights`.
+        '''
+        if rng is None:
+            rng = np.random.default_rng()
+
+        if density is None:
+            weights = [rng.uniform(low, high, size=(n_in, n_out)) for n_in, n_out in zip(layer_sizes, layer_sizes[1:])]
+        else:
+            weights = [SparseWeights.random((n_in, n_out), density, low, high, rng) for n_in, n_out in zip(layer_sizes, layer_sizes[1:])]
+        biases  = [rng.uniform(low, high, size=n_out) for n_out in layer_sizes[1:]]
+        bias_values = np.round(rng.uniform(0, 1, size=len(layer_sizes) - 1), 2)
+        inputs  = rng.uniform(0, 1, size=layer_sizes[0])
+
+        return cls(weights, biases, bias_values, inputs, activations)
+
+
+    @property
+    def layer_sizes(self):
+        return [self.weights[0].shape[0]] + [w.shape[1] for w in self.weights]
+
+
+    @property
+    def num_layers(self):
+        return len(self.weights) + 1
+
+
+    def forward(self):
+        '''Propagate the inputs through every layer, one matmul per layer.'''
+        pre_activations = [None]
+        activations = propagate(self.inputs, self.weights, self.biases, self.bias_values, self.activation_functions, pre_activations)
+
+        self.pre_activations = pre_activations
+        self.activations     = activations
+        return activations[-1]
+
+
+    def forward_batch(self, inputs, pre_activations=None):
+        '''Activations of every layer for an ``(N, layer_sizes[0])`` batch, one matmul per layer.
+
+        Returns a list with one ``(N, layer_sizes[l])`` array per layer (the first is
+        the inputs themselves); the pre-activations of the other layers are appended
+        to ``pre_activations`` when given. The model's own single-sample state is
+        left untouched.
+        '''
+        inputs = np.atleast_2d(np.asarray(inputs, dtype=float))
+        assert inputs.shape[1] == self.layer_sizes[0], f"inputs have {inputs.shape[1]} features, expected {self.layer_sizes[0]}"
+        return propagate(inputs, self.weights, self.biases, self.bias_values, self.activation_functions, pre_activations)
+
+
+    def extended_activations(self, layer_idx):
+        '''Outputs of layer ``layer_idx`` with the bias node's value appended.'''
+        return np.append(self.activations[layer_idx], self.bias_values[layer_idx])
+
+
+    def weight_entries(self, layer_idx, rows, cols):
+        '''Extended weights at ``(rows[k], cols[k])``; row ``layer_sizes[layer_idx]`` is the bias node.'''
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        is_bias = rows == self.layer_sizes[layer_idx]
+
+        entries = np.empty(len(rows))
+        entries[~is_bias] = self.weights[layer_idx][rows[~is_bias], cols[~is_bias]]
+        entries[is_bias]  = self.biases[layer_idx][cols[is_bias]]
+        return entries
+
+
+    def connected_entries(self, layer_idx, rows, cols):
+        '''Positions ``(i, j)`` into ``rows`` and ``cols`` of the existing connections between them.
+
+        ``rows`` are extended indices (the bias node connects to every neuron). Every
+        pair is connected for dense weights; for sparse ones only the stored entries
+        are, found without going through all ``len(rows) * len(cols)`` pairs.
+        '''
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        weights = self.weights[layer_idx]
+        if not is_sparse(weights):
+            i, j = np.meshgrid(np.arange(len(rows)), np.arange(len(cols)), indexing='ij')
+            return i.ravel(), j.ravel()
+
+        is_bias = rows == self.layer_sizes[layer_idx]
+        neuron_rows = np.flatnonzero(~is_bias)
+        i, j = weights.connected(rows[neuron_rows], cols)
+        bias_i, bias_j = np.meshgrid(np.flatnonzero(is_bias), np.arange(len(cols)), indexing='ij')
+        i = np.concatenate([neuron_rows[i], bias_i.ravel()])
+        j = np.concatenate([j, bias_j.ravel()])
+        order = np.lexsort((j, i))
+        return i[order], j[order]
+
+
+    def fingerprint(self):
+        '''Hash of the architecture and every weight, bias and input value.'''
+        digest = hashlib.sha256()
+        weight_arrays = [part for w in self.weights for part in ((w.indptr, w.indices, w.data) if is_sparse(w) else (w,))]
+        for array in [np.asarray(self.layer_sizes), *weight_arrays, *self.biases, self.bias_values, self.inputs]:
+            _update_digest(digest, array)
+        digest.update(' '.join(activation.name for activation in self.activation_functions).encode())
+        return digest.hexdigest()
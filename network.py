@@ -0,0 +1,511 @@
+'''Reusable mobjects for drawing a layered network.
+
+`build_layer` draws one layer in the style of scene.py (``'scene'``: small colored
+circles with math labels) or of medium.py (``'medium'``: filled squares and circles
+with Tex labels). `NetworkMobject` stacks the layers of a whole network, draws its
+connections and keeps index arrays, so any node or edge is found in constant time
+from its ``(layer, i, j)`` indices instead of by scanning VGroups.
+'''
+from manim import *
+
+from edges import EdgeBundle
+from labels import label_factory, value_label
+from layout import LABEL_POSITION, NetworkLayout, stack_centers
+
+
+COLORS = {'input': GREEN, 'hidden': YELLOW, 'output': BLUE, 'bias': RED}
+
+
+class SceneLayerStyle:
+    '''Small colored circles with ``MathTex`` labels, as drawn by `scene.NeuralNetworkVisualisation`.
+
+    ``layer_idx`` is the index of the layer in the network; hidden layer ``l`` is
+    titled ``Hidden layer l`` and its activations are labelled ``a_i^{(l-1)}``.
+    '''
+    font_size       = 24
+    layer_font_size = 14
+
+    def node(self, layer_type, shape_params):
+        return Circle(**({'color': COLORS.get(layer_type, COLORS['hidden']), 'radius': 0.3} | shape_params))
+
+
+    def bias_node(self):
+        return Circle(color=COLORS['bias'], radius=0.3)
+
+
+    def title(self, layer_type, layer_idx):
+        text = {'input': 'Input layer', 'output': 'Output layer'}.get(layer_type, f'Hidden layer {layer_idx or 1}')
+        return text, Text, {'stroke_width': 1}
+
+
+    def node_label(self, layer_type, layer_idx, i):
+        if layer_type == 'input':
+            tex = fr"x_{i}"
+        elif layer_type == 'output':
+            tex = fr"y_{i}"
+        else:
+            tex = fr"a_{i}^{{({(layer_idx or 1) - 1})}}"
+        return tex, MathTex
+
+
+    def bias_label(self, layer_type, layer_idx):
+        tex = r"b_i" if layer_type == 'input' else fr"b^{{({(layer_idx or 1) - 1})}}"
+        return tex, MathTex
+
+
+    def title_buff(self, node_buffer):
+        return node_buffer / 2
+
+
+class MediumLayerStyle:
+    '''Filled squares (inputs) and circles with ``Tex`` labels, as drawn by medium.py.'''
+    font_size       = 30
+    layer_font_size = 35
+
+    def node(self, layer_type, shape_params):
+        if layer_type == 'input':
+            return Square(**({'side_length': 1, 'fill_opacity': 0.6, 'color': GREEN} | shape_params))
+        return Circle(**({'radius': 0.6, 'fill_opacity': 0.6, 'color': BLUE} | shape_params))
+
+
+    def bias_node(self):
+        return Circle(color=RED, fill_opacity=0.6, radius=0.35)
+
+
+    def title(self, layer_type, layer_idx):
+        if layer_idx is None:
+            layer_idx = 0 if layer_type[0] == 'i' else 'n'
+        return fr"{layer_type.capitalize()} Layer (\(L_{layer_idx}\))", Tex, {}
+
+
+    def node_label(self, layer_type, layer_idx, i):
+        #-- use the first letter of the layer type
+        return fr"\({layer_type[0]}_{i}\)", Tex
+
+
+    def bias_label(self, layer_type, layer_idx):
+        return r"b", Tex
+
+
+    def title_buff(self, node_buffer):
+        return 0.25
+
+
+LAYER_STYLES = {'scene': SceneLayerStyle(), 'medium': MediumLayerStyle()}
+ELLIPSIS = (r"\vdots", MathTex)
+
+
+def layer_labels(layer_style, layer_type, layer_idx, neuron_indices, include_bias, add_layer_label=True, add_node_labels=True):
+    '''``(title, node_labels)`` of a layer as `label_factory` arguments, ``(text, cls[, kwargs])``.
+
+    ``title`` is None and ``node_labels`` empty when disabled; the bias node's label
+    comes last.
+    '''
+    title = layer_style.title(layer_type, layer_idx) if add_layer_label else None
+    node_labels = []
+    if add_node_labels:
+        node_labels = [layer_style.node_label(layer_type, layer_idx, i) for i in neuron_indices]
+        if include_bias:
+            node_labels.append(layer_style.bias_label(layer_type, layer_idx))
+    return title, node_labels
+
+
+class LayerNodes(VGroup):
+    '''Node mobjects of one layer: the drawn neurons, then the bias node if there is one.
+
+    ``self[k]`` draws neuron ``neuron_indices[k]`` and ``self[bias_index]`` is the bias
+    node (``bias_index`` is None without one). ``positions`` maps an extended neuron
+    index (the bias node is ``num_neurons``) back to its position, or -1 when the
+    neuron is not drawn. `build_layer` also records ``column_centers`` and
+    ``half_widths``, the nodes' centers (relative to the origin the layer was built
+    around) and half widths, for `layout.NetworkLayout`.
+    '''
+
+    def __init__(self, nodes, neuron_indices, num_neurons, bias_node=None, **kwargs):
+        super().__init__(*nodes, **kwargs)
+        self.neuron_indices = np.asarray(neuron_indices, dtype=int)
+        self.num_neurons    = num_neurons
+        self.bias_index     = None
+        self.column_centers = np.zeros((0, 3))
+        self.half_widths    = np.zeros(0)
+        self.positions      = np.full(num_neurons + 1, -1)
+        self.positions[self.neuron_indices] = np.arange(len(self.neuron_indices))
+
+        if bias_node is not None:
+            bias_node.is_bias_node = True   # still set for code that probes nodes for it
+            self.bias_index = len(self.submobjects)
+            self.positions[num_neurons] = self.bias_index
+            self.add(bias_node)
+
+
+    @property
+    def extended_indices(self):
+        '''Extended neuron index of every node mobject, in order.'''
+        if self.bias_index is None:
+            return self.neuron_indices
+        return np.append(self.neuron_indices, self.num_neurons)
+
+
+    @property
+    def neurons(self):
+        return VGroup(*self.submobjects[:len(self.neuron_indices)])
+
+
+    @property
+    def bias_node(self):
+        return None if self.bias_index is None else self[self.bias_index]
+
+
+    def node(self, i):
+        '''Mobject of extended neuron index ``i``, or None when it is not drawn.'''
+        position = self.positions[i]
+        return None if position < 0 else self[position]
+
+
+def neuron_positions(nodes):
+    '''Positions of the neuron (non-bias) nodes of a layer's node VGroup.'''
+    if isinstance(nodes, LayerNodes):
+        return np.arange(len(nodes.neuron_indices))
+    #-- plain VGroup built elsewhere: fall back to the bias node marker
+    return np.array([k for k, node in enumerate(nodes) if not hasattr(node, 'is_bias_node')], dtype=int)
+
+
+def build_layer(
+    num_nodes,
+    include_bias    = True,
+    layer_type      = 'hidden',
+    style           = 'scene',
+    orientation     = 'vertical',
+    node_buffer     = 0.75,
+    add_node_labels = True,
+    font_size       = None,
+    add_layer_label = True,
+    layer_font_size = None,
+    layer_idx       = None,
+    shape_params:dict = {},
+    neuron_indices  = None,
+    ):
+    '''One layer as ``VGroup(nodes, title, node_labels)``, plus an ellipsis when collapsed.
+
+    Parameters
+    ----------
+    style: str
+        Key of `LAYER_STYLES` deciding the node shapes and labels
+    neuron_indices: np.ndarray
+        Neurons that get a node mobject; the others are replaced by a single
+        ``\\vdots``, appended as the layer's fourth part. All neurons by default
+    font_size, layer_font_size: int
+        Sizes of the node labels and of the title; the style's defaults when None
+
+    ``nodes`` is a `LayerNodes`; the title and node labels are empty VGroups when
+    disabled, so every part always sits at the same index. The bias node's label
+    is the last node label.
+    '''
+    layer_style = LAYER_STYLES[style]
+    layer_type = layer_type.lower()
+    if neuron_indices is None:
+        neuron_indices = np.arange(num_nodes)
+    if font_size is None:
+        font_size = layer_style.font_size
+    if layer_font_size is None:
+        layer_font_size = layer_style.layer_font_size
+
+    #-- every TeX label of the layer is compiled in one batch, on the first one built
+    title_label, label_args = layer_labels(layer_style, layer_type, layer_idx, neuron_indices, include_bias, add_layer_label, add_node_labels)
+    label_factory.prefetch(([title_label[:2]] if title_label else []) + label_args + [ELLIPSIS])
+
+    prototype = layer_style.node(layer_type, shape_params)
+    nodes = LayerNodes(
+        [prototype.copy() for _ in neuron_indices],
+        neuron_indices,
+        num_nodes,
+        bias_node = layer_style.bias_node() if include_bias else None,
+    )
+
+    #-- every node shares its style's size, so the stack is computed from two measurements
+    horizontal = orientation.lower() in ('horizontal', 'h')
+    axis = 0 if horizontal else 1
+    sizes = np.full(len(nodes), prototype.length_over_dim(axis))
+    half_widths = np.full(len(nodes), prototype.width / 2)
+    if include_bias:
+        sizes[nodes.bias_index] = nodes.bias_node.length_over_dim(axis)
+        half_widths[nodes.bias_index] = nodes.bias_node.width / 2
+
+    #-- collapsed layer: an ellipsis takes the place of the hidden neurons
+    slots = list(nodes)
+    ellipsis = None
+    if len(neuron_indices) < num_nodes:
+        gap = int(np.argmax(neuron_indices != np.arange(len(neuron_indices))))
+        ellipsis = label_factory.get(ELLIPSIS[0], 24, ELLIPSIS[1])
+        slots.insert(gap, ellipsis)
+        sizes = np.insert(sizes, gap, ellipsis.length_over_dim(axis))
+
+    #-- a column top to bottom or a row right to left, centered on the origin
+    centers = stack_centers(sizes, node_buffer, LEFT if horizontal else DOWN)
+    for slot, center in zip(slots, centers):
+        slot.move_to(center)
+    if ellipsis is not None:
+        centers = np.delete(centers, gap, axis=0)
+    nodes.column_centers = centers
+    nodes.half_widths    = half_widths
+
+    title = VGroup()
+    if title_label is not None:
+        text, cls, kwargs = title_label
+        title = label_factory.get(text, layer_font_size, cls, **kwargs)
+        title.next_to(nodes.neurons if len(neuron_indices) else nodes, UP, buff=layer_style.title_buff(node_buffer))
+
+    node_labels = VGroup(*[label_factory.get(text, font_size, cls) for text, cls in label_args])
+    for label, node in zip(node_labels, nodes):
+        label.move_to(node)
+
+    layer = VGroup(nodes, title, node_labels)
+    if ellipsis is not None:
+        layer.add(ellipsis)
+    return layer
+
+
+class NetworkMobject(VGroup):
+    '''Every layer of a network, built with `build_layer`, and their connections.
+
+    ``self[l]`` is layer ``l``. ``visible_neurons[l]`` holds the extended neuron index
+    (the bias node is ``layer_sizes[l]``) of every node mobject of layer ``l``. After
+    `create_connections`, ``connections[l]`` draws the edges between layers ``l`` and
+    ``l + 1`` and ``edges[l] = (sources, targets)`` holds the node positions of every
+    drawn edge, in the order of the `EdgeBundle`. `node`, `bias_node` and `edge` look
+    mobjects up through these arrays.
+
+    The connections are not submobjects, so the layers can be animated on their own.
+    Node centers and edge endpoints come from ``layout`` (see `layout.NetworkLayout`),
+    which describes the network where it was built: create the connections and
+    labels before moving it.
+    '''
+
+    def __init__(self, layer_sizes, style='scene', lod=None, layer_buff=1.5, max_width=None, max_height=None, **layer_kwargs):
+        super().__init__()
+        self.layer_sizes = [int(num_nodes) for num_nodes in layer_sizes]
+        self.lod         = lod
+        self.connections = None
+        self.edges       = []
+        self._edge_index = []
+
+        last = len(self.layer_sizes) - 1
+        layer_types = ['input' if l == 0 else 'output' if l == last else 'hidden' for l in range(last + 1)]
+        neuron_indices = [lod.visible_neurons(n) if lod is not None else np.arange(n) for n in self.layer_sizes]
+
+        #-- declare the TeX labels of every layer first, so they compile in a single batch
+        for layer_idx, layer_type in enumerate(layer_types):
+            title, node_labels = layer_labels(
+                LAYER_STYLES[style],
+                layer_type,
+                layer_idx,
+                neuron_indices[layer_idx],
+                include_bias    = layer_idx < last,
+                add_layer_label = layer_kwargs.get('add_layer_label', True),
+                add_node_labels = layer_kwargs.get('add_node_labels', True),
+            )
+            label_factory.prefetch(([title[:2]] if title else []) + node_labels)
+
+        for layer_idx, num_nodes in enumerate(self.layer_sizes):
+            self.add(build_layer(
+                num_nodes       = num_nodes,
+                include_bias    = layer_idx < last,
+                layer_type      = layer_types[layer_idx],
+                style           = style,
+                layer_idx       = layer_idx,
+                neuron_indices  = neuron_indices[layer_idx],
+                **layer_kwargs,
+            ))
+
+        #-- one pass over the arrays of the whole network, then one shift per layer
+        self.layout = NetworkLayout(
+            node_centers = [layer[0].column_centers for layer in self],
+            half_widths  = [layer[0].half_widths for layer in self],
+            layer_boxes  = [[layer.get_corner(DL), layer.get_corner(UR)] for layer in self],
+            layer_buff   = layer_buff,
+            max_width    = max_width,
+            max_height   = max_height,
+        )
+        self.layout.apply(self)
+        self.node_centers = self.layout.node_centers
+        self.visible_neurons = [layer[0].extended_indices for layer in self]
+        #-- vertical dots of layers drawn with a gap, found by position before labels are added
+        self.ellipses = [layer[3] for layer in self if len(layer) > 3]
+
+
+    def nodes(self, layer_idx):
+        return self[layer_idx][0]
+
+
+    def neuron_nodes(self, layer_idx):
+        '''Node mobjects of layer ``layer_idx`` that are neurons rather than the bias node.'''
+        return self[layer_idx][0].neurons
+
+
+    def num_visible_neurons(self, layer_idx):
+        return len(self[layer_idx][0].neuron_indices)
+
+
+    def node(self, layer_idx, i):
+        '''Node of neuron ``i`` of a layer (``i = layer_sizes[layer_idx]`` is the bias node).'''
+        return self[layer_idx][0].node(i)
+
+
+    def bias_node(self, layer_idx):
+        return self[layer_idx][0].bias_node
+
+
+    def static_parts(self):
+        '''Nodes, layer titles, ellipses and connections: the mobjects that do not change while values propagate.'''
+        parts = [part for layer in self for part in (layer[0], layer[1])] + self.ellipses
+        if self.connections is not None:
+            parts.append(self.connections)
+        return parts
+
+
+    def visible_values(self, layer_idx, values):
+        '''Entries of a per-neuron array (or an extended one, bias last) that belong to the node mobjects.'''
+        indices = self.visible_neurons[layer_idx]
+        if len(values) == self.layer_sizes[layer_idx]:
+            indices = indices[:self.num_visible_neurons(layer_idx)]
+        return np.asarray(values)[indices]
+
+
+    def value_labels(self, layer_idx, values, font_size=12):
+        '''Labels showing ``values`` (see `visible_values`) on the nodes of a layer.'''
+        values = self.visible_values(layer_idx, values)
+        labels = VGroup(*[value_label(value, font_size=font_size) for value in values])
+        for label, center in zip(labels, self.node_centers[layer_idx]):
+            label.move_to(center)
+        return labels
+
+
+    def visible_weights(self, layer_idx, weight_entries):
+        '''Extended weight submatrix between the drawn nodes of two layers.
+
+        ``weight_entries(layer_idx, rows, cols)`` reads the weights, as
+        `model.NetworkModel.weight_entries` does.
+        '''
+        rows = self.visible_neurons[layer_idx]
+        cols = self.visible_neurons[layer_idx+1][:self.num_visible_neurons(layer_idx+1)]
+        rows, cols = np.meshgrid(rows, cols, indexing='ij')
+        return weight_entries(layer_idx, rows.ravel(), cols.ravel()).reshape(rows.shape)
+
+
+    def select_edges(self, layer_idx, weight_entries=None, connected_entries=None):
+        '''Node positions ``(sources, targets)`` of the edges drawn between two layers.
+
+        Every source node connects to every neuron of the next layer, or only to
+        the ones ``connected_entries(layer_idx, rows, cols)`` returns (as
+        `model.NetworkModel.connected_entries` does for sparse weights), unless the
+        level-of-detail policy samples them (by ``|w|``, uniformly without
+        ``weight_entries``) or replaces the pair with a band, in which case both
+        arrays are empty.
+        '''
+        rows = self.visible_neurons[layer_idx]
+        cols = self.visible_neurons[layer_idx+1][:self.num_visible_neurons(layer_idx+1)]
+        if connected_entries is None:
+            sources, targets = np.meshgrid(np.arange(len(rows)), np.arange(len(cols)), indexing='ij')
+            sources, targets = sources.ravel(), targets.ravel()
+        else:
+            sources, targets = connected_entries(layer_idx, rows, cols)
+        if self.lod is None:
+            return sources, targets
+
+        if self.lod.use_band(len(sources)):
+            return sources[:0], targets[:0]
+
+        if weight_entries is None:
+            weights = np.ones(len(sources))
+        else:
+            weights = weight_entries(layer_idx, rows[sources], cols[targets])
+        keep = self.lod.select_edges(weights)
+        return sources[keep], targets[keep]
+
+
+    def create_bundle(self, layer_idx, sources, targets, arrow_width=0.5, tip_length=0.15, tip_width=0.15):
+        starts, ends = self.layout.edge_endpoints(layer_idx, sources, targets)
+        return EdgeBundle(
+            starts,
+            ends,
+            stroke_width = arrow_width,
+            tip_length   = tip_length,
+            tip_width    = tip_width,
+        )
+
+
+    def create_band(self, layer_idx, weight_entries=None):
+        '''Single shaded band standing in for every connection of a dense layer pair.'''
+        source_nodes, target_nodes = self[layer_idx][0], self[layer_idx+1][0]
+        strength = 1 if weight_entries is None else min(1, float(np.abs(self.visible_weights(layer_idx, weight_entries)).mean()))
+        band = Polygon(
+            source_nodes.get_corner(UR),
+            target_nodes.get_corner(UL),
+            target_nodes.get_corner(DL),
+            source_nodes.get_corner(DR),
+            stroke_width = 0,
+            fill_color   = GREY,
+            fill_opacity = 0.15 + 0.35 * strength,
+        )
+        return VGroup(band)
+
+
+    def create_connections(self, weight_entries=None, connected_entries=None, **bundle_kwargs):
+        '''One `EdgeBundle` (or band) per pair of consecutive layers, see `select_edges`.'''
+        connections = VGroup()
+        self.edges, self._edge_index = [], []
+        for layer_idx in range(len(self) - 1):
+            sources, targets = self.select_edges(layer_idx, weight_entries, connected_entries)
+            #-- sorted ``source * num_targets + target`` keys, one per drawn edge, and the edge of each key
+            num_targets = self.num_visible_neurons(layer_idx + 1)
+            keys = np.asarray(sources, dtype=np.int64) * num_targets + targets
+            order = np.argsort(keys, kind='stable')
+            self.edges.append((sources, targets))
+            self._edge_index.append((keys[order], order, num_targets))
+
+            if len(sources) == 0:
+                connections.add(self.create_band(layer_idx, weight_entries))
+            else:
+                connections.add(self.create_bundle(layer_idx, sources, targets, **bundle_kwargs))
+
+        self.connections = connections
+        return connections
+
+
+    def edge_label_anchors(self, layer_idx, position=LABEL_POSITION):
+        '''Label anchor of every drawn edge between layer ``layer_idx`` and the next one.'''
+        return self.layout.edge_anchors(layer_idx, *self.edges[layer_idx], position)
+
+
+    def edge_sources(self, layer_idx):
+        '''Extended neuron index of the source of every drawn edge.'''
+        return self.visible_neurons[layer_idx][self.edges[layer_idx][0]]
+
+
+    def edge_targets(self, layer_idx):
+        '''Neuron index of the target of every drawn edge.'''
+        return self.visible_neurons[layer_idx+1][self.edges[layer_idx][1]]
+
+
+    def edge_weights(self, layer_idx, weight_entries):
+        return weight_entries(layer_idx, self.edge_sources(layer_idx), self.edge_targets(layer_idx))
+
+
+    def edge_index(self, layer_idx, i, j):
+        '''Index in ``connections[layer_idx]`` of the edge from neuron ``i`` to neuron ``j``; -1 if not drawn.'''
+        keys, order, num_targets = self._edge_index[layer_idx]
+        source = self[layer_idx][0].positions[i]
+        target = self[layer_idx+1][0].positions[j]
+        if source < 0 or not 0 <= target < num_targets:
+            return -1
+        key = source * num_targets + target
+        k = np.searchsorted(keys, key)
+        if k == len(keys) or keys[k] != key:
+            return -1
+        return int(order[k])
+
+
+    def edge(self, layer_idx, i, j):
+        '''``(bundle, k)`` where edge ``k`` of ``bundle`` connects neuron ``i`` to ``j``; None if not drawn.'''
+        k = self.edge_index(layer_idx, i, j)
+        return None if k < 0 else (self.connections[layer_idx], k)
@@ -0,0 +1,126 @@
+'''Render `NeuralNetworkVisualisation` one section per process and stitch the parts.
+
+Every worker runs the whole scene, but only renders the frames of its own section;
+the sections before it skip their animations, which leaves the mobjects in the
+state they have at the start of that section. The partial movies are joined with
+ffmpeg's concat demuxer using stream copy, so nothing is encoded twice.
+
+Finished sections are kept in a `RenderCache`; sections whose configuration did not
+change are taken from the cache instead of being rendered again. Use ``--rerender``
+for sections whose animation code was edited.
+
+    python parallel_render.py -q l -j 8 -o media/network.mp4
+    python parallel_render.py -q l --rerender 2
+'''
+import argparse
+import importlib
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from render_cache import RenderCache
+
+
+QUALITIES = {
+    'l': 'low_quality',
+    'm': 'medium_quality',
+    'h': 'high_quality',
+    'p': 'production_quality',
+    'k': 'fourk_quality',
+}
+
+
+def render_section(module_name, scene_name, section, seed, quality, media_dir):
+    from manim import tempconfig
+
+    scene_cls = getattr(importlib.import_module(module_name), scene_name)
+    scene_cls.render_section = section
+    scene_cls.seed = seed
+
+    start = time.perf_counter()
+    with tempconfig({
+        'quality'         : QUALITIES[quality],
+        'media_dir'       : os.path.join(media_dir, f'section_{section}'),
+        'output_file'     : f'{scene_name}_section_{section}',
+        'progress_bar'    : 'none',
+        'verbosity'       : 'WARNING',
+    }):
+        scene = scene_cls()
+        scene.render()
+        movie = str(scene.renderer.file_writer.movie_file_path)
+
+    return movie, time.perf_counter() - start
+
+
+def concat_movies(movies, output):
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as file_list:
+        for movie in movies:
+            file_list.write(f"file '{os.path.abspath(movie)}'\n")
+
+    try:
+        subprocess.run(
+            ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', file_list.name, '-c', 'copy', output],
+            check=True,
+        )
+    finally:
+        os.remove(file_list.name)
+
+
+def render_parallel(module_name, scene_name, output, quality='l', jobs=None, seed=None, media_dir='media/parallel', cache=None, rerender=()):
+    scene_cls = getattr(importlib.import_module(module_name), scene_name)
+    if seed is not None:
+        scene_cls.seed = seed
+    if cache is None:
+        cache = RenderCache()
+
+    sections = range(scene_cls.num_sections())
+    fingerprint = scene_cls.build_model().fingerprint()
+    keys = [cache.section_key(scene_cls, section, quality, fingerprint) for section in sections]
+    movies = {section: cache.get(key) for section, key in zip(sections, keys) if section not in rerender}
+    movies = {section: movie for section, movie in movies.items() if movie is not None}
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {
+            section: pool.submit(render_section, module_name, scene_name, section, scene_cls.seed, quality, media_dir)
+            for section in sections if section not in movies
+        }
+        for section in sections:
+            if section in futures:
+                movie, seconds = futures[section].result()
+                movies[section] = cache.put(keys[section], movie)
+                print(f"section {section}: rendered in {seconds:.1f}s")
+            else:
+                print(f"section {section}: cached")
+
+    concat_movies([movies[section] for section in sections], output)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='scene')
+    parser.add_argument('--scene', default='NeuralNetworkVisualisation')
+    parser.add_argument('-q', '--quality', choices=QUALITIES, default='l')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('-o', '--output', default='media/videos/NeuralNetworkVisualisation.mp4')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--media-dir', default='media/parallel')
+    parser.add_argument('--cache-dir', default='media/render_cache')
+    parser.add_argument('--rerender', type=int, nargs='*', default=[], help='sections to render even if cached')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    render_parallel(
+        args.module, args.scene, args.output, args.quality, args.jobs, args.seed, args.media_dir,
+        cache    = RenderCache(args.cache_dir),
+        rerender = set(args.rerender),
+    )
+    print(f"wrote {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+'''Per-method timing report for building and rendering a scene.
+
+Set ``NN_PROFILE`` to the report path when rendering to turn it on:
+
+    NN_PROFILE=profile.json manim -ql scene.py NeuralNetworkVisualisation
+
+Every profiled scene-building method and every ``play`` call is recorded with its
+wall time, the net number of allocated memory blocks, and the mobject and point
+counts it produced (or, for ``play``, that were on screen afterwards). Frame
+encoding and the final movie concatenation are recorded too. The report is Chrome
+trace-event JSON (open it in chrome://tracing, Perfetto or speedscope) with an
+extra per-name ``summary``.
+'''
+import json
+import os
+import sys
+import time
+
+from manim import Mobject
+
+from labels import label_factory
+from streaming import frame_count
+
+
+# Scene methods that build mobjects or compute values.
+PROFILED_METHODS = (
+    'create_model',
+    'create_layers',
+    'create_connections',
+    'create_input_values',
+    'create_node_labels',
+    'create_connection_labels',
+    'add_multiplication_to_weights',
+    'multiply_weights',
+    'create_sum_labels',
+    'create_activations_labels',
+    'create_activation_inset',
+    'create_activation_heatmap',
+)
+
+
+def mobject_counts(mobjects):
+    '''``(mobjects, points)`` in the families of ``mobjects``.'''
+    family = [member for mobject in mobjects for member in mobject.get_family()]
+    return len(family), sum(len(member.points) for member in family)
+
+
+class SceneProfiler:
+    def __init__(self, scene, path, methods=PROFILED_METHODS, functions=()):
+        '''``functions`` are ``(module, name)`` pairs of module-level builders to profile too.'''
+        self.scene     = scene
+        self.path      = path
+        self.methods   = [name for name in methods if hasattr(scene, name)]
+        self.functions = list(functions)
+        self.events    = []
+        self.encode_time   = 0.0
+        self.encode_frames = 0
+        self._originals = []
+        self._origin = time.perf_counter()
+
+
+    def _record(self, name, category, start, end, allocs, **args):
+        self.events.append({
+            'name' : name,
+            'cat'  : category,
+            'ph'   : 'X',
+            'ts'   : (start - self._origin) * 1e6,
+            'dur'  : (end - start) * 1e6,
+            'pid'  : os.getpid(),
+            'tid'  : 0,
+            'args' : {'allocs': allocs, **args},
+        })
+
+
+    def _wrap(self, name, function, category):
+        def wrapper(*args, **kwargs):
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            end = time.perf_counter()
+
+            counts = {}
+            if isinstance(result, Mobject):
+                counts['mobjects'], counts['points'] = mobject_counts([result])
+            self._record(name, category, start, end, sys.getallocatedblocks() - blocks, **counts)
+            return result
+        return wrapper
+
+
+    def _wrap_play(self, play):
+        def wrapper(*args, **kwargs):
+            blocks = sys.getallocatedblocks()
+            encode_time, encode_frames = self.encode_time, self.encode_frames
+            start = time.perf_counter()
+            play(*args, **kwargs)
+            end = time.perf_counter()
+
+            mobjects, points = mobject_counts(self.scene.mobjects)
+            self._record(
+                'play', 'play', start, end, sys.getallocatedblocks() - blocks,
+                animations    = [type(animation).__name__ for animation in getattr(self.scene, 'animations', None) or []],
+                run_time      = getattr(self.scene, 'duration', None),
+                mobjects      = mobjects,
+                points        = points,
+                frames        = self.encode_frames - encode_frames,
+                encode_s      = self.encode_time - encode_time,
+            )
+        return wrapper
+
+
+    def _wrap_write_frame(self, write_frame):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = write_frame(*args, **kwargs)
+            self.encode_time += time.perf_counter() - start
+            self.encode_frames += frame_count(*args, **kwargs)
+            return result
+        return wrapper
+
+
+    def _patch(self, owner, name, replacement):
+        self._originals.append((owner, name, owner.__dict__.get(name)))
+        setattr(owner, name, replacement)
+
+
+    def attach(self):
+        for name in self.methods:
+            self._patch(self.scene, name, self._wrap(name, getattr(self.scene, name), 'build'))
+        for module, name in self.functions:
+            self._patch(module, name, self._wrap(name, getattr(module, name), 'build'))
+
+        renderer = self.scene.renderer
+        file_writer = renderer.file_writer
+        self._patch(self.scene, 'play', self._wrap_play(self.scene.play))
+        self._patch(file_writer, 'write_frame', self._wrap_write_frame(file_writer.write_frame))
+        self._patch(file_writer, 'combine_to_movie', self._wrap('combine_to_movie', file_writer.combine_to_movie, 'encode'))
+
+        scene_finished = renderer.scene_finished
+        def finished(*args, **kwargs):
+            scene_finished(*args, **kwargs)
+            self.write_report()
+            self.detach()
+        self._patch(renderer, 'scene_finished', finished)
+        return self
+
+
+    def detach(self):
+        for owner, name, original in reversed(self._originals):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._originals = []
+
+
+    def summary(self):
+        summary = {}
+        for event in self.events:
+            entry = summary.setdefault(event['name'], {'calls': 0, 'total_s': 0.0, 'allocs': 0, 'mobjects': 0, 'points': 0})
+            entry['calls']   += 1
+            entry['total_s'] += event['dur'] / 1e6
+            entry['allocs']  += event['args']['allocs']
+            entry['mobjects'] = max(entry['mobjects'], event['args'].get('mobjects', 0))
+            entry['points']   = max(entry['points'], event['args'].get('points', 0))
+        for entry in summary.values():
+            entry['mean_s'] = entry['total_s'] / entry['calls']
+        return dict(sorted(summary.items(), key=lambda item: -item[1]['total_s']))
+
+
+    def write_report(self):
+        report = {
+            'traceEvents'     : self.events,
+            'displayTimeUnit' : 'ms',
+            'summary'         : self.summary(),
+            'totals'          : {
+                'wall_s'        : time.perf_counter() - self._origin,
+                'encode_s'      : self.encode_time,
+                'frames'        : self.encode_frames,
+                'plays'         : sum(event['name'] == 'play' for event in self.events),
+                'label_cache'   : {'hits': label_factory.hits, 'misses': label_factory.misses, 'size': len(label_factory)},
+                'tex_batches'   : label_factory.tex_batch.compiled_batches if label_factory.tex_batch is not None else 0,
+            },
+        }
+        with open(self.path, 'w') as file:
+            json.dump(report, file, indent=1, default=str)
+
+
+def attach_from_env(scene, **kwargs):
+    '''Profile ``scene`` if ``NN_PROFILE`` is set; returns the profiler or None.'''
+    path = os.environ.get('NN_PROFILE')
+    if not path:
+        return None
+    return SceneProfiler(scene, path, **kwargs).attach()
@@ -0,0 +1,108 @@
+'''Content-addressed cache of rendered scene sections.
+
+A section's movie is stored under a hash of everything that determines its frames:
+scene class, network architecture and values, seed, quality, section index and the
+scene's settings, i.e. its class attributes (``freeze_background``, ``lod``) and the
+upper-case constants of the modules defining it (``BATCH_MOVES``, ``MOVE_LAG_RATIO``).
+The sources of the scene's own modules, and of every module they loaded from the
+same directory, are hashed too, so editing the animation code invalidates the cache;
+bump `CACHE_VERSION` when something outside them (e.g. the manim version) changes
+the frames. Re-rendering with an unchanged configuration reuses the cached movies;
+sections can still be forced to re-render by the caller.
+'''
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+
+# Part of every key; bump it to invalidate all cached sections.
+CACHE_VERSION = 1
+
+# Class attributes that select what is rendered rather than how it looks.
+UNHASHED_SETTINGS = {'render_section'}
+
+
+def _encode(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if hasattr(value, '__dict__'):
+        return {'type': type(value).__qualname__, **vars(value)}
+    return str(value)
+
+
+def scene_settings(scene_cls):
+    '''Class attributes and module constants of ``scene_cls`` that can change its frames.'''
+    manim = vars(sys.modules['manim']) if 'manim' in sys.modules else {}
+    settings = {}
+    for klass in reversed(scene_cls.__mro__):
+        if klass is object or klass.__module__.split('.')[0] == 'manim':
+            continue
+        for name, value in vars(sys.modules[klass.__module__]).items():
+            if name.isupper() and not callable(value) and not isinstance(value, type(sys)) and manim.get(name) is not value:
+                settings[f"{klass.__module__}.{name}"] = value
+        for name, value in vars(klass).items():
+            if name.startswith('_') or name in UNHASHED_SETTINGS or callable(value) or isinstance(value, (classmethod, staticmethod, property)):
+                continue
+            settings[name] = value
+    return settings
+
+
+def source_digest(scene_cls):
+    '''Hash of the sources of the modules in the directory of ``scene_cls``'s module that are loaded.'''
+    directory = os.path.dirname(os.path.abspath(sys.modules[scene_cls.__module__].__file__))
+    files = sorted({
+        os.path.abspath(module.__file__)
+        for module in list(sys.modules.values())
+        if getattr(module, '__file__', None) and os.path.dirname(os.path.abspath(module.__file__)) == directory
+    })
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, 'rb') as file:
+            digest.update(os.path.basename(path).encode())
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, directory='media/render_cache'):
+        self.directory = directory
+
+
+    def key(self, **parts):
+        encoded = json.dumps(parts, sort_keys=True, default=_encode)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+    def section_key(self, scene_cls, section, quality, fingerprint=None):
+        if fingerprint is None:
+            fingerprint = scene_cls.build_model().fingerprint()
+        return self.key(
+            scene     = f"{scene_cls.__module__}.{scene_cls.__qualname__}",
+            model     = fingerprint,
+            seed      = scene_cls.seed,
+            quality   = quality,
+            section   = section,
+            settings  = scene_settings(scene_cls),
+            code      = source_digest(scene_cls),
+            version   = CACHE_VERSION,
+        )
+
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.mp4")
+
+
+    def get(self, key):
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+
+    def put(self, key, movie):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.tmp"
+        shutil.copyfile(movie, tmp_path)
+        os.replace(tmp_path, path)
+        return path
@@ -1,7 +1,17 @@
 from manim import *
-import random
-from math import tanh
-from pprint import pprint
+import os
+
+from background import FrozenBackground
+from batch import activation_heatmap, diverging_colormap
+from insets import ActivationInset
+from labels import NumberLabelGroup, format_value, value_label
+from loader import load_model
+from lod import LODPolicy
+from model import NetworkModel
+import network
+from network import NetworkMobject
+from profiling import attach_from_env
+from streaming import renderer_from_env
 
 
 HIDDEN_LAYERS = 2
@@ -9,374 +19,376 @@ HIDDEN_LAYERS_NEURONS = 3
 INPUT_NEURONS = 2
 OUTPUT_NEURONS = 1
 NEURON_RADIUS = 0.2
-COLORS = {'input': GREEN, 'hidden': YELLOW, 'output': BLUE, 'bias': RED}
+LAYER_SIZES = [INPUT_NEURONS] + [HIDDEN_LAYERS_NEURONS] * HIDDEN_LAYERS + [OUTPUT_NEURONS]
+BATCH_MOVES = 'layer'   # None (one play per connection), 'node' or 'layer'
+MOVE_LAG_RATIO = 0.05
+SEED = int(os.environ.get('NN_SEED', 0))
+LOD = LODPolicy(seed=SEED)
+CHECKPOINT = os.environ.get('NN_CHECKPOINT')
+BATCH_SIZE = 256
+DENSITY = float(os.environ['NN_DENSITY']) if 'NN_DENSITY' in os.environ else None
+FREEZE_BACKGROUND = os.environ.get('NN_FREEZE_BACKGROUND', '1') != '0'
+# One activation for every layer (e.g. 'relu') or one per layer ('relu,relu,sigmoid').
+ACTIVATIONS = os.environ.get('NN_ACTIVATIONS')
+ACTIVATION_INSETS = os.environ.get('NN_ACTIVATION_INSETS', '0') != '0'
 
 class NeuralNetworkVisualisation(Scene):
+    # When set, only this section is rendered; the others still run (so the mobject
+    # state at the start of the section is right) but skip their animations.
+    # Section 0 builds the network, section ``l + 1`` propagates layer ``l``.
+    render_section = None
+    # Seed of the model's random generator. Fixed by default so re-renders produce
+    # the same network (and manim can reuse its partial movies).
+    seed = SEED
+    # Weight file (.npy/.npz/.safetensors) to visualise instead of a random network.
+    checkpoint = CHECKPOINT
+    # Neurons per layer of the random network (ignored when a checkpoint is set).
+    layer_sizes = LAYER_SIZES
+    # Fraction of connections kept between two layers of the random network; None
+    # for a fully connected one, otherwise the weights are `sparse.SparseWeights`.
+    density = DENSITY
+    # Level of detail policy deciding which nodes and edges are drawn, see `lod.LODPolicy`.
+    lod = LOD
+    # Activation of every layer, see `activations`; tanh when None.
+    activations = ACTIVATIONS.split(',') if ACTIVATIONS and ',' in ACTIVATIONS else ACTIVATIONS
+    # Show a plot of each layer's activation with its neurons' pre-activations.
+    activation_insets = ACTIVATION_INSETS
+    # Draw the nodes, titles and connections into the camera background once they
+    # are on screen instead of in every ``play`` (see `background.FrozenBackground`).
+    freeze_background = FREEZE_BACKGROUND
+    background = None
+
+    # Steps played for every pair of consecutive layers, in order. Each step builds
+    # its mobjects right before it plays and registers the ones that are only needed
+    # during the stage in ``stage['mobjects']`` so they are released afterwards.
+    propagation_steps = (
+        'show_connection_weights',
+        'show_weighted_inputs',
+        'show_products',
+        'reveal_bias_value',
+        'move_products_to_nodes',
+        'show_sums',
+        'show_activations',
+    )
+    # Steps that animate per-edge labels; skipped for layer pairs drawn as a band.
+    edge_label_steps = {
+        'show_connection_weights',
+        'show_weighted_inputs',
+        'show_products',
+        'move_products_to_nodes',
+    }
+
+    def __init__(self, renderer=None, camera_class=Camera, skip_animations=False, **kwargs):
+        if renderer is None:
+            renderer = renderer_from_env(camera_class=camera_class, skip_animations=skip_animations)
+        super().__init__(renderer=renderer, camera_class=camera_class, skip_animations=skip_animations, **kwargs)
+
+
+    def setup(self):
+        self.profiler = attach_from_env(self, functions=[(network, 'build_layer')])
+
+
+    def play(self, *args, **kwargs):
+        if self.background is not None:
+            self.background.refresh()
+        super().play(*args, **kwargs)
+
+
+    def freeze_network(self):
+        '''Move the static parts of the network into the camera background, if enabled.'''
+        if self.freeze_background:
+            self.background = FrozenBackground(self, self.network.static_parts()).freeze()
+        return self.background
+
+
     def create_layers(self):
-        network = VGroup()
-        network.add(self.create_layer(
-            num_nodes       = INPUT_NEURONS,
-            include_bias    = True, 
-            layer_type      = 'input', 
-            layer_idx       = 0,
-        ))
-        network.add(*[self.create_layer(
-            num_nodes       = HIDDEN_LAYERS_NEURONS,
-            include_bias    = True, 
-            layer_type      = 'hidden', 
-            layer_idx       = i,) for i in range(HIDDEN_LAYERS)])
-        network.add(self.create_layer(
-            num_nodes       = OUTPUT_NEURONS,
-            include_bias    = False, 
-            layer_type      = 'output', 
-            layer_idx       = 2,
-        ))
-        network.arrange(RIGHT, buff=1.5)
-        self.network = network
-
-        return network
+        self.network = NetworkMobject(self.model.layer_sizes, style='scene', lod=self.lod, max_width=config.frame_width - 1, max_height=config.frame_height - 0.5)
+        #-- extended neuron indices (bias node = layer size) that get a node mobject
+        self.visible_neurons = self.network.visible_neurons
+        return self.network
 
 
     def create_connections(self):
-        all_connections = VGroup()
-        for layer, next_layer in zip(self.network, self.network[1:]):
-            connections = self.create_connections_between_layers(layer[0], next_layer[0])
-            all_connections.add(connections)
+        all_connections = self.network.create_connections(self.model.weight_entries, self.model.connected_entries)
+        self.edges = self.network.edges
         return all_connections
-    
 
-    def create_layer(
-        self,
-        num_nodes, 
-        include_bias    = True, 
-        layer_type      = 'hidden', 
-        node_buffer     = 0.75, 
-        add_node_labels = True,
-        font_size       = 30,
-        add_layer_label = True,
-        layer_font_size = 35,
-        layer_idx       = None,
-        shape_params:dict = {},
-        ):
-
-        layer = VGroup()
-        layer_nodes = VGroup(*[Circle(color=COLORS[layer_type], radius=0.3) for _ in range(num_nodes)])
-        layer.add(layer_nodes)
-
-        if include_bias:
-            bias_node = Circle(color=COLORS['bias'], radius=0.3)
-            bias_node.is_bias_node = True
-            layer_nodes.add(bias_node)
-
-        if layer_type == 'input':
-            label = Text(
-                'Input layer',
-                font_size=14,
-                stroke_width=1
-                )
-            node_labels = VGroup(*[MathTex(fr"x_{i}", font_size=24) for i in range(num_nodes)])
-            if include_bias:
-                bias_label = MathTex(fr"b_i", font_size=24)
-                node_labels.add(bias_label)
-        elif layer_type == 'hidden':
-            label = Text(
-                f'Hidden layer {layer_idx+1}',
-                font_size=14,
-                stroke_width=1
-                )
-            node_labels = VGroup(*[MathTex(fr"a_{i}^{{({layer_idx})}}", font_size=24) for i in range(num_nodes)])
-            if include_bias:
-                bias_label = MathTex(fr"b^{{({layer_idx})}}", font_size=24)
-                node_labels.add(bias_label)
-        elif layer_type == 'output':
-            label = Text(
-                'Output layer',
-                font_size=14,
-                stroke_width=1
-                )
-            node_labels = VGroup(*[MathTex(fr"y_{i}", font_size=24) for i in range(num_nodes)])
-            
-        layer_nodes.arrange(DOWN, buff=node_buffer)
-        label.next_to(layer, UP, buff=node_buffer / 2)
-        layer.add(label)
-        
-        for label, node in zip(node_labels, layer_nodes):
-            label.move_to(node)
-        layer.add(node_labels)
-
-        return layer
-
-
-    def create_connections_between_layers(self, source_layer:VGroup, target_layer: VGroup, arrow_width=1):
-        connections = VGroup() 
-
-        for j, node in enumerate(source_layer):
-            node_connections = VGroup()
-            for i, target_node in enumerate(target_layer):
-                if hasattr(target_node,'is_bias_node'):
-                    continue
-                arrow = Line(
-                    start=source_layer[j].get_right(), 
-                    end=target_layer[i].get_left(),
-                )
-                arrow.stroke_width = 0.5
-                arrow.add_tip(
-                    tip_length=0.15, 
-                    tip_width=0.15)
-                node_connections.add(arrow)
-            connections.add(node_connections)
-
-        return connections
+
+    def num_visible_neurons(self, layer_idx):
+        '''Number of node mobjects in a layer that are neurons rather than the bias node.'''
+        return self.network.num_visible_neurons(layer_idx)
+
+
+    def edge_weights(self, layer_idx):
+        '''Weights of the drawn edges between layer ``layer_idx`` and the next one.'''
+        return self.network.edge_weights(layer_idx, self.model.weight_entries)
+
+
+    def edge_inputs(self, layer_idx):
+        '''Value entering each drawn edge from its source node.'''
+        return self.model.extended_activations(layer_idx)[self.network.edge_sources(layer_idx)]
+
+
+    @classmethod
+    def build_model(cls):
+        rng = np.random.default_rng(cls.seed)
+        if cls.checkpoint is not None:
+            return load_model(cls.checkpoint, rng=rng, activations=cls.activations)
+        return NetworkModel.random(cls.layer_sizes, rng=rng, density=cls.density, activations=cls.activations)
+
+
+    def create_model(self):
+        self.model = self.build_model()
+        return self.model
 
 
     def create_input_values(self):
-        input_values = [random.uniform(0, 1) for _ in range(INPUT_NEURONS + 1)]
+        input_values = self.model.extended_activations(0)
         self.input_values = input_values
         return input_values
     
     
-    def create_node_labels(self, layer: VGroup, values):
-        labels = VGroup(*[Text(str(round(value, 2)), font_size=14) for value in values])
-        for input_node, label in zip(layer[0], labels):
-            label.move_to(input_node)
-        layer.add(labels)
+    def create_node_labels(self, layer_idx, values):
+        labels = self.network.value_labels(layer_idx, values, font_size=14)
+        self.network[layer_idx].add(labels)
         return labels
     
 
-    def create_connection_weights(self, network):
-        weights = []
-        for layer in range(len(network) - 1):
-            weights.append([[random.uniform(0, 1) for _ in range(len(self.network[layer+1][0]))] for _ in range(len(self.network[layer][0]))])
-        return weights
-
-    
-    def create_connection_labels(self, all_connections, weights):
-        weights_labels_group = VGroup()
-
-        for layer in range(len(all_connections)):
-            weights_layer_group = VGroup()
-            for prev in range(len(self.network[layer][0])):
-                weights_node_group = VGroup()
-                for next_ in range(len(self.network[layer+1][0])):
-                    if hasattr(self.network[layer+1][0][next_], 'is_bias_node'):
-                        continue
-                    weight_label = Text(str(round(weights[layer][prev][next_], 2)), font_size=12)
-                    middle_of_line = (all_connections[layer][prev][next_].get_start() + all_connections[layer][prev][next_].get_end()) / 2
-                    label_position = (all_connections[layer][prev][next_].get_start() + middle_of_line) / 2
-                    weight_label.move_to(label_position)
-                    weights_node_group.add(weight_label)
-                weights_layer_group.add(weights_node_group)
-            weights_labels_group.add(weights_layer_group)
-
-        return weights_labels_group
-
-
-    def add_multiplication_to_weights(self, prev_layer, next_layer, connections, weights, values):
-        labels_group = VGroup()
-        for prev in range(len(prev_layer)):
-            node_group = VGroup()
-            for next_ in range(len(next_layer)):
-                if hasattr(next_layer[next_], 'is_bias_node'):
-                    continue
-                string_value = str(round(weights[prev][next_], 2)) + f"*{round(values[prev], 2)}"
-                weight_label = Text(string_value, font_size=12)
-                middle_of_line = (connections[prev][next_].get_start() + connections[prev][next_].get_end()) / 2
-                label_position = (connections[prev][next_].get_start() + middle_of_line) / 2
-                weight_label.move_to(label_position)
-                node_group.add(weight_label)
-            labels_group.add(node_group)
-        return labels_group
-
-
-    def multiply_weights(self, prev_layer, next_layer, connections, weights, values):
-        labels_group = VGroup()
-        for prev in range(len(prev_layer)):
-            node_group = VGroup()
-            for next_ in range(len(next_layer)):
-                if hasattr(next_layer[next_], 'is_bias_node'):
-                    continue
-                string_value = str(round(weights[prev][next_] * values[prev], 2))
-                weight_label = Text(string_value, font_size=12)
-                middle_of_line = (connections[prev][next_].get_start() + connections[prev][next_].get_end()) / 2
-                label_position = (connections[prev][next_].get_start() + middle_of_line) / 2
-                weight_label.move_to(label_position)
-                node_group.add(weight_label)
-            labels_group.add(node_group)
-        return labels_group
-
-
-    def move_multiplication_to_nodes(self, multiplications, prev_layer, next_layer):
-        print(multiplications)
-        # print(next_layer)
-        for prev in range(len(prev_layer)):
-            
-            for next_ in range(len(next_layer)):
-                if hasattr(next_layer[next_], 'is_bias_node'):
-                    continue
-                print(prev, next_)
-                self.play(multiplications[prev][next_].animate.move_to(next_layer[next_]), runtime=0.1)
-                self.play(multiplications[prev][next_].animate.fade(1), runtime=0.1)
-
-        # for node in range(len(multiplications)):
-        #     print(multiplications[node])
-        #     for conn in range(len(multiplications[node])):
-        #         print(node, conn, multiplications[node], next_layer[node])
-        #         self.play(multiplications[conn][node].animate.move_to(next_layer[node]), runtime=0.1)
-        #         self.play(multiplications[conn][node].animate.fade(1), runtime=0.1)
+    def create_connection_labels(self, layer_idx):
+        weights = self.edge_weights(layer_idx)
+        return NumberLabelGroup([format_value(weight) for weight in weights], self.network.edge_label_anchors(layer_idx))
+
+
+    def add_multiplication_to_weights(self, layer_idx):
+        '''Texts of the ``weight*input`` labels; shown by updating the weight labels in place.'''
+        weights = self.edge_weights(layer_idx)
+        values  = self.edge_inputs(layer_idx)
+        return [f"{format_value(weight)}*{format_value(value)}" for weight, value in zip(weights, values)]
+
+
+    def multiply_weights(self, layer_idx):
+        '''Texts of the product labels; shown by updating the weight labels in place.'''
+        products = self.edge_weights(layer_idx) * self.edge_inputs(layer_idx)
+        return [format_value(product) for product in products]
+
+
+    def move_multiplication_to_nodes(self, multiplications, targets, next_layer, batch=BATCH_MOVES, lag_ratio=MOVE_LAG_RATIO):
+        '''Move every product label into the node it feeds and fade it out.
+
+        ``targets[k]`` is the index of the node in ``next_layer`` that label ``k`` moves
+        to. ``batch`` controls how many render segments this takes: ``None`` plays each
+        connection on its own, ``'node'`` groups the labels per target node and
+        ``'layer'`` moves all of them in a single ``LaggedStart``.
+        '''
+        if batch is None:
+            for label, target in zip(multiplications, targets):
+                self.play(label.animate.move_to(next_layer[target]), run_time=0.1)
+                self.play(label.animate.fade(1), run_time=0.1)
+            return
+
+        pairs = list(zip(multiplications, targets))
+        if batch == 'node':
+            groups = [[(label, target) for label, target in pairs if target == node] for node in np.unique(targets)]
+        elif batch == 'layer':
+            groups = [pairs]
+        else:
+            raise ValueError(f"Unsupported batch mode `{batch}`.")
+
+        for group in groups:
+            self.play(LaggedStart(*[label.animate.move_to(next_layer[target]) for label, target in group], lag_ratio=lag_ratio))
+            self.play(FadeOut(*[label for label, _ in group]), run_time=0.2)
             
 
-    def calc_sum(self, weights, prev_layer, next_layer):
-        sums = []
-        next_layer_len = 0
-        for i in range(len(next_layer)):
-            if not hasattr(next_layer[i], 'is_bias_node'):
-                next_layer_len += 1
-        for next_ in range(next_layer_len):
-            sum = 0
-            for prev in range(len(prev_layer)):
-                sum += weights[prev][next_] * prev_layer[prev]
-            sums.append(sum)
-        return sums
-
-
-    def create_sum_labels(self, sums, layer):
-        layer_len = 0
-        for i in range(len(layer)):
-            if not hasattr(layer[i], 'is_bias_node'):
-                layer_len += 1
-        sums_group = VGroup()
-        for node in range(layer_len):
-            sum_label = Text(str(round(sums[node], 2)), font_size=12)
-            sum_label.move_to(layer[node])
-            sums_group.add(sum_label)
-        return sums_group
-
-
-    def calc_neuron_activations(self, sums):
-        neuron_activations = []
-        for sum in sums:
-            neuron_activations.append(tanh(sum))
-        return neuron_activations
+    def calc_sum(self, layer_idx):
+        return self.model.pre_activations[layer_idx]
+
+
+    def create_sum_labels(self, layer_idx, sums):
+        return self.network.value_labels(layer_idx, sums)
+
+
+    def calc_neuron_activations(self, layer_idx):
+        return self.model.activations[layer_idx]
     
 
-    def create_activations_labels(self, neuron_activations, layer):
-        layer_len = 0
-        for i in range(len(layer)):
-            if not hasattr(layer[i], 'is_bias_node'):
-                layer_len += 1
-        activations_group = VGroup()
-        for node in range(layer_len):
-            activations_label = Text(str(round(neuron_activations[node], 2)), font_size=12)
-            activations_label.move_to(layer[node])
-            activations_group.add(activations_label)
-        return activations_group
+    def create_activations_labels(self, layer_idx, neuron_activations):
+        return self.network.value_labels(layer_idx, neuron_activations)
     
 
     def change_bias_node_label(self, bias_label, bias_value):
-        value_label = Text(str(bias_value), font_size=12)
+        bias_value_label = value_label(bias_value)
         self.play(FadeOut(bias_label), run_time=0.2)
-        value_label.move_to(bias_label)
-        self.play(Create(value_label))
+        bias_value_label.move_to(bias_label)
+        self.play(Create(bias_value_label))
+
+
+    def show_connection_weights(self, stage):
+        labels = self.create_connection_labels(stage['layer_idx'])
+        stage['labels'] = labels
+        stage['mobjects'].append(labels)
+        self.play(Create(labels), run_time=1)
+        self.wait(0.5)
+
+
+    def show_weighted_inputs(self, stage):
+        mult_weights = self.add_multiplication_to_weights(stage['layer_idx'])
+        self.play(stage['labels'].transition_to(mult_weights))
+        self.wait(0.5)
+
+
+    def show_products(self, stage):
+        mult_weights_result = self.multiply_weights(stage['layer_idx'])
+        self.play(stage['labels'].transition_to(mult_weights_result))
+
+
+    def reveal_bias_value(self, stage):
+        next_idx = stage['layer_idx'] + 1
+        num_neurons = self.num_visible_neurons(next_idx)
+        node_labels = self.network[next_idx][2]
+        for node_label in node_labels[:num_neurons]:
+            self.play(FadeOut(node_label), run_time=0.2)
+        if len(node_labels) > num_neurons:
+            self.change_bias_node_label(node_labels[num_neurons], self.model.bias_values[next_idx])
+
+
+    def move_products_to_nodes(self, stage):
+        layer_idx = stage['layer_idx']
+        _, targets = self.edges[layer_idx]
+        self.move_multiplication_to_nodes(stage['labels'], targets, self.network[layer_idx+1][0])
+
+
+    def show_sums(self, stage):
+        layer_idx = stage['layer_idx'] + 1
+        sums_labels = self.create_sum_labels(layer_idx, self.calc_sum(layer_idx))
+        stage['mobjects'].append(sums_labels)
+        self.play(Create(sums_labels), run_time=1)
+        self.wait(1)
+        self.play(FadeOut(sums_labels), run_time=1)
+
+
+    def create_activation_inset(self, layer_idx):
+        '''Plot of the activation of a layer with its drawn neurons placed on the curve.'''
+        inset = ActivationInset(
+            self.model.activation_functions[layer_idx-1],
+            self.network.visible_values(layer_idx, self.calc_sum(layer_idx)),
+            self.network.visible_values(layer_idx, self.calc_neuron_activations(layer_idx)),
+        )
+        inset.next_to(self.network.nodes(layer_idx), DOWN, buff=0.3)
+        return inset
+
+
+    def show_activations(self, stage):
+        layer_idx = stage['layer_idx'] + 1
+        activations_labels = self.create_activations_labels(layer_idx, self.calc_neuron_activations(layer_idx))
+        animations = [Create(activations_labels)]
+        if self.activation_insets:
+            inset = self.create_activation_inset(layer_idx)
+            stage['mobjects'].append(inset)
+            animations.append(FadeIn(inset))
+        self.play(*animations, run_time=1)
+
+
+    def propagate_layer(self, layer_idx):
+        stage = {'layer_idx': layer_idx, 'mobjects': []}
+        has_edges = len(self.edges[layer_idx][0]) > 0
+        for step in self.propagation_steps:
+            if not has_edges and step in self.edge_label_steps:
+                continue
+            getattr(self, step)(stage)
+
+        #-- release everything that only lived for this stage
+        self.remove(*stage['mobjects'])
+        stage.clear()
+
+
+    @classmethod
+    def num_sections(cls):
+        return len(cls.build_model().layer_sizes)
+
+
+    def begin_section(self, section_idx, name):
+        skip = self.render_section is not None and section_idx != self.render_section
+        self.next_section(name, skip_animations=skip)
 
 
     def construct(self):
+        self.begin_section(0, 'network')
+        self.create_model()
         layers = self.create_layers()
         self.play(Create(layers, run_time=3))
         input_values = self.create_input_values()
-        input_labels = self.create_node_labels(layers[0], input_values)
+        input_labels = self.create_node_labels(0, input_values)
 
         self.play(Transform(layers[0][2], input_labels, run_time=1))
 
         all_connections = self.create_connections()
         self.play(Create(all_connections), run_time=2)
-        weights = self.create_connection_weights(self.network)
-        connection_labels = self.create_connection_labels(all_connections, weights)
-        self.play(Create(connection_labels), run_time=1)
+        self.freeze_network()
         self.wait(0.5)
 
+        for layer_idx in range(len(self.network) - 1):
+            self.begin_section(layer_idx + 1, f'layer_{layer_idx}')
+            self.propagate_layer(layer_idx)
 
-        mult_weights = self.add_multiplication_to_weights(self.network[0][0], self.network[1][0], all_connections[0], weights[0], input_values)
-        self.play(Transform(connection_labels[0], mult_weights))
-        self.wait(0.5)
-
-        mult_weights_result = self.multiply_weights(self.network[0][0], self.network[1][0], all_connections[0], weights[0], input_values)
-        self.play(Transform(connection_labels[0], mult_weights_result))
-
-        for node_label in range(len(self.network[1][2])):
-            if not hasattr(self.network[1][0][node_label], 'is_bias_node'):
-                self.play(FadeOut(self.network[1][2][node_label]), run_time=0.2)
-            else:
-                bias2 = round(random.uniform(0, 1))
-                self.change_bias_node_label(self.network[1][2][node_label], bias2)
-
-        self.move_multiplication_to_nodes(mult_weights_result, self.network[0][0], self.network[1][0])
-
-        sums = self.calc_sum(weights[0], input_values, self.network[1][0])
-        sums_labels = self.create_sum_labels(sums, self.network[1][0])
-        self.play(Create(sums_labels), runtime=1)
         self.wait(1)
-        self.play(FadeOut(sums_labels), runtime=1)
 
-        activations = self.calc_neuron_activations(sums)
-        activations_labels = self.create_activations_labels(activations, self.network[1][0])
-        self.play(Create(activations_labels), runtime=1)
 
+class BatchNeuralNetworkVisualisation(NeuralNetworkVisualisation):
+    '''A whole batch of samples flowing through the network, shown as one heatmap per layer.
 
-        activations.append(bias2)
-        mult_weights = self.add_multiplication_to_weights(self.network[1][0], self.network[2][0], all_connections[1], weights[1], activations)
-        self.play(Transform(connection_labels[1], mult_weights))
-        self.wait(0.5)
+    The forward pass is one matmul per layer for the whole ``(BATCH_SIZE, inputs)``
+    matrix; each layer is drawn as a single image (rows = drawn neurons, columns =
+    samples) and its nodes are filled with the mean activation, so the number of
+    mobjects does not depend on the batch size.
+    '''
+    batch_size = BATCH_SIZE
 
-        mult_weights_result = self.multiply_weights(self.network[1][0], self.network[2][0], all_connections[1], weights[1], activations)
-        self.play(Transform(connection_labels[1], mult_weights_result))
+    def create_batch_inputs(self):
+        rng = np.random.default_rng((self.seed, 1))
+        return rng.uniform(0, 1, size=(self.batch_size, self.model.layer_sizes[0]))
 
-        for node_label in range(len(self.network[2][2])):
-            if not hasattr(self.network[2][0][node_label], 'is_bias_node'):
-                self.play(FadeOut(self.network[2][2][node_label]), run_time=0.2)
-            else:
-                bias3 = round(random.uniform(0, 1), 2)
-                self.change_bias_node_label(self.network[2][2][node_label], bias3)
 
-        self.move_multiplication_to_nodes(mult_weights_result, self.network[1][0], self.network[2][0])
+    def create_activation_heatmap(self, layer_idx, activations):
+        nodes = self.network.neuron_nodes(layer_idx)
+        neurons = self.network[layer_idx][0].neuron_indices
 
-        sums = self.calc_sum(weights[1], activations, self.network[2][0])
-        sums_labels = self.create_sum_labels(sums, self.network[2][0])
-        self.play(Create(sums_labels), runtime=1)
-        self.wait(1)
-        self.play(FadeOut(sums_labels), runtime=1)
+        heatmap = activation_heatmap(activations[:, neurons], width=1.2, height=nodes.height)
+        heatmap.next_to(nodes, LEFT, buff=0.1)
+        return heatmap
 
-        activations = self.calc_neuron_activations(sums)
-        activations_labels = self.create_activations_labels(activations, self.network[2][0])
-        self.play(Create(activations_labels), runtime=1)
 
+    def fill_nodes_with_mean(self, layer_idx, activations):
+        '''Animations filling each drawn neuron with the color of its mean activation.'''
+        nodes = self.network.neuron_nodes(layer_idx)
+        neurons = self.network[layer_idx][0].neuron_indices
 
-        activations.append(bias3)
-        mult_weights = self.add_multiplication_to_weights(self.network[2][0], self.network[3][0], all_connections[2], weights[2], activations)
-        self.play(Transform(connection_labels[2], mult_weights))
-        self.wait(0.5)
+        mean_colors = diverging_colormap(activations[:, neurons].mean(axis=0))
+        return [node.animate.set_fill(rgb_to_color(rgba[:3] / 255), opacity=0.8) for node, rgba in zip(nodes, mean_colors)]
 
-        mult_weights_result = self.multiply_weights(self.network[2][0], self.network[3][0], all_connections[2], weights[2], activations)
-        self.play(Transform(connection_labels[2], mult_weights_result))
 
-        for node_label in range(len(self.network[3][2])):
-            if not hasattr(self.network[3][0][node_label], 'is_bias_node'):
-                self.play(FadeOut(self.network[3][2][node_label]), run_time=0.2)
-            else:
-                bias3 = round(random.uniform(0, 1), 2)
-                self.change_bias_node_label(self.network[3][2][node_label], bias3)
+    @classmethod
+    def num_sections(cls):
+        #-- `construct` never calls `begin_section`, so the whole scene is one section
+        return 1
 
-        self.move_multiplication_to_nodes(mult_weights_result, self.network[2][0], self.network[3][0])
 
-        sums = self.calc_sum(weights[2], activations, self.network[3][0])
-        sums_labels = self.create_sum_labels(sums, self.network[3][0])
-        self.play(Create(sums_labels), runtime=1)
-        self.wait(1)
-        self.play(FadeOut(sums_labels), runtime=1)
+    def construct(self):
+        self.create_model()
+        layers = self.create_layers()
+        self.play(Create(layers, run_time=3))
 
-        activations = self.calc_neuron_activations(sums)
-        activations_labels = self.create_activations_labels(activations, self.network[3][0])
-        self.play(Create(activations_labels), runtime=1)
+        all_connections = self.create_connections()
+        self.play(Create(all_connections), run_time=2)
+        self.wait(0.5)
 
+        activations = self.model.forward_batch(self.create_batch_inputs())
+        for layer_idx, layer_activations in enumerate(activations):
+            heatmap = self.create_activation_heatmap(layer_idx, layer_activations)
+            self.play(
+                FadeIn(heatmap),
+                FadeOut(self.network[layer_idx][2]),
+                *self.fill_nodes_with_mean(layer_idx, layer_activations),
+                run_time=1,
+            )
 
         self.wait(1)
-
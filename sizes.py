@@ -0,0 +1,7 @@
+'''Network architectures written on the command line as ``inputs x hidden width x hidden layers``.'''
+
+
+def parse_size(size):
+    '''Layer sizes of ``'2x3x2'``: two inputs, two hidden layers of three neurons and one output.'''
+    inputs, width, depth = (int(part) for part in size.split('x'))
+    return [inputs] + [width] * depth + [1]
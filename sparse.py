@@ -0,0 +1,198 @@
+'''Sparse weight matrices for pruned and sparsely connected networks.
+
+`SparseWeights` stores a ``(n_in, n_out)`` weight matrix in CSR form (row
+pointers, column indices and values of the stored entries, rows in order and
+columns sorted within a row) with plain NumPy arrays. It supports what the
+models, the scenes and the trainer do with dense weights, at a cost that grows
+with the number of stored entries instead of ``n_in * n_out``:
+
+    a @ w                   # forward pass, for one sample or a batch
+    w[rows, cols]           # entries, zero where nothing is stored
+    w.nonzero()             # (rows, cols) of the stored entries, i.e. the edges
+
+`NetworkModel` accepts them anywhere it accepts a dense matrix. The helpers at the
+bottom let code handle both kinds of weights the same way.
+'''
+import numpy as np
+
+
+def _sum_by(values, segments, num_segments):
+    '''Sums of ``values`` (along the last axis) per segment id; ``segments`` must be sorted.'''
+    out = np.zeros(values.shape[:-1] + (num_segments,))
+    if len(segments) == 0:
+        return out
+    starts = np.flatnonzero(np.r_[True, segments[1:] != segments[:-1]])
+    out[..., segments[starts]] = np.add.reduceat(values, starts, axis=-1)
+    return out
+
+
+class SparseWeights:
+    '''Weight matrix of shape ``shape`` holding ``data[k]`` at ``(rows[k], indices[k])``.
+
+    ``indptr[i]:indptr[i+1]`` is the slice of ``indices``/``data`` belonging to row
+    ``i``. Entries that are not stored are zero and stay zero: training only
+    updates ``data``, so the connectivity of a pruned network is kept.
+    '''
+    # make ``ndarray @ SparseWeights`` defer to `__rmatmul__`
+    __array_ufunc__ = None
+
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr  = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data    = np.asarray(data, dtype=float)
+        self.shape   = tuple(int(n) for n in shape)
+
+        assert len(self.indptr) == self.shape[0] + 1, f"indptr has {len(self.indptr)} entries for {self.shape[0]} rows"
+        assert len(self.indices) == len(self.data) == self.indptr[-1]
+        self.rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        #-- stored entries in column order, for sums over the rows of each column
+        self._column_order = np.lexsort((self.rows, self.indices))
+        #-- flat positions of the stored entries, sorted since entries are in (row, col) order
+        self._keys = self.rows * self.shape[1] + self.indices
+
+
+    @classmethod
+    def from_coo(cls, rows, cols, values, shape):
+        '''Matrix with ``values[k]`` at ``(rows[k], cols[k])``; positions must be unique.'''
+        rows   = np.asarray(rows, dtype=np.int64)
+        cols   = np.asarray(cols, dtype=np.int64)
+        order  = np.lexsort((cols, rows))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=shape[0]))])
+        return cls(indptr, cols[order], np.asarray(values, dtype=float)[order], shape)
+
+
+    @classmethod
+    def from_dense(cls, dense, threshold=0.0, block_rows=4096):
+        '''Entries of ``dense`` with ``|w| > threshold``.
+
+        Rows are read a block at a time, so memory-mapped matrices are never loaded whole.
+        '''
+        rows, cols, values = [], [], []
+        for start in range(0, dense.shape[0], block_rows):
+            block = np.asarray(dense[start:start+block_rows], dtype=float)
+            block_rows_idx, block_cols = np.nonzero(np.abs(block) > threshold)
+            rows.append(block_rows_idx + start)
+            cols.append(block_cols)
+            values.append(block[block_rows_idx, block_cols])
+        return cls.from_coo(np.concatenate(rows), np.concatenate(cols), np.concatenate(values), dense.shape)
+
+
+    @classmethod
+    def random(cls, shape, density=0.05, low=0, high=1, rng=None):
+        '''Uniform weights on ``round(density * n_in * n_out)`` positions drawn without replacement.'''
+        if rng is None:
+            rng = np.random.default_rng()
+        num_entries = int(round(density * shape[0] * shape[1]))
+        positions = np.sort(rng.choice(shape[0] * shape[1], size=num_entries, replace=False))
+        rows, cols = np.divmod(positions, shape[1])
+        return cls.from_coo(rows, cols, rng.uniform(low, high, size=num_entries), shape)
+
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+
+    @property
+    def density(self):
+        return self.nnz / max(1, self.shape[0] * self.shape[1])
+
+
+    def nonzero(self):
+        '''``(rows, cols)`` of the stored entries, in row order.'''
+        return self.rows, self.indices
+
+
+    def positions(self, rows, cols):
+        '''Index in ``data`` of the entries ``(rows[k], cols[k])``, -1 where nothing is stored.'''
+        query = np.asarray(rows, dtype=np.int64) * self.shape[1] + np.asarray(cols, dtype=np.int64)
+        if self.nnz == 0:
+            return np.full(query.shape, -1)
+        found = np.minimum(np.searchsorted(self._keys, query), self.nnz - 1)
+        return np.where(self._keys[found] == query, found, -1)
+
+
+    def __getitem__(self, index):
+        rows, cols = index
+        positions = self.positions(rows, cols)
+        entries = np.where(positions >= 0, self.data[np.maximum(positions, 0)], 0.0) if self.nnz else np.zeros(positions.shape)
+        return entries if entries.ndim else float(entries)
+
+
+    def __rmatmul__(self, a):
+        '''``a @ self`` for a vector or an ``(N, n_in)`` batch.'''
+        a = np.asarray(a, dtype=float)
+        contributions = a[..., self.rows] * self.data
+        order = self._column_order
+        return _sum_by(contributions[..., order], self.indices[order], self.shape[1])
+
+
+    def dot_transpose(self, x):
+        '''``x @ self.T`` for a vector or an ``(N, n_out)`` batch, e.g. backpropagated errors.'''
+        x = np.asarray(x, dtype=float)
+        return _sum_by(x[..., self.indices] * self.data, self.rows, self.shape[0])
+
+
+    def outer(self, a, delta):
+        '''``(a.T @ delta)`` at the stored entries only: the gradient of ``data``.'''
+        return np.einsum('nk,nk->k', a[:, self.rows], delta[:, self.indices])
+
+
+    def connected(self, rows, cols):
+        '''Positions ``(i, j)`` into ``rows`` and ``cols`` of the stored entries of ``self[rows][:, cols]``.
+
+        Costs the number of entries stored in ``rows``, never ``len(rows) * len(cols)``.
+        '''
+        rows = np.asarray(rows, dtype=np.int64)
+        col_position = np.full(self.shape[1], -1, dtype=np.int64)
+        col_position[np.asarray(cols, dtype=np.int64)] = np.arange(len(cols))
+
+        counts = self.indptr[rows + 1] - self.indptr[rows]
+        i = np.repeat(np.arange(len(rows)), counts)
+        #-- data index of every entry of the selected rows, row by row
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(self.indptr[rows], counts)
+        j = col_position[self.indices[k]]
+        keep = j >= 0
+        return i[keep], j[keep]
+
+
+    def with_data(self, data):
+        '''Same connectivity with other values (``data`` is used as is, not copied).'''
+        sparse = object.__new__(SparseWeights)
+        sparse.__dict__.update(self.__dict__)
+        sparse.data = data
+        return sparse
+
+
+    def copy(self):
+        return self.with_data(self.data.copy())
+
+
+    def toarray(self):
+        dense = np.zeros(self.shape)
+        dense[self.rows, self.indices] = self.data
+        return dense
+
+
+def is_sparse(weights):
+    return isinstance(weights, SparseWeights)
+
+
+def dense(weights):
+    '''``weights`` as a NumPy array; sparse matrices are expanded.'''
+    return weights.toarray() if is_sparse(weights) else weights
+
+
+def weight_values(weights):
+    '''The trainable values of ``weights``: ``data`` of a sparse matrix, the array itself otherwise.'''
+    return weights.data if is_sparse(weights) else weights
+
+
+def weight_gradient(weights, inputs, delta):
+    '''Gradient of the values of ``weights`` (see `weight_values`) for a layer ``inputs @ weights``.'''
+    return weights.outer(inputs, delta) if is_sparse(weights) else inputs.T @ delta
+
+
+def backpropagate(delta, weights):
+    '''``delta @ weights.T`` for either kind of weights.'''
+    return weights.dot_transpose(delta) if is_sparse(weights) else delta @ weights.T
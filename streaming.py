@@ -0,0 +1,152 @@
+'''Render a whole scene through one long-running ffmpeg process.
+
+Manim normally encodes every ``play``/``wait`` call into its own partial movie file
+and concatenates them at the end. The propagation scenes make hundreds of short
+calls, so on a render node most of the time goes into opening, writing and
+re-reading those files. `StreamingFileWriter` instead pipes every frame into a
+single encoder as soon as it is rendered, and never writes a partial movie.
+
+    NN_STREAM=1 manim -qh scene.py NeuralNetworkVisualisation
+
+With ``NN_FRAME_PIPE`` set to a path, the raw RGBA frames are also written to that
+named pipe (created if missing) for another process to consume. The writer then
+blocks until a reader opens the pipe.
+
+Partial movie caching does not apply in this mode (every animation is rendered),
+sections are not saved as separate videos and the scenes' sound track, which they
+do not use, is not muxed in. Only the Cairo renderer is supported.
+'''
+import inspect
+import os
+import subprocess
+
+from manim import Camera, RendererType, config, logger
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.scene.scene_file_writer import SceneFileWriter
+
+
+def frame_count(*args, **kwargs):
+    '''Number of frames a ``write_frame(*args, **kwargs)`` call writes.
+
+    The arguments are bound to `SceneFileWriter.write_frame`, whatever the signature
+    of the writer actually called, so its ``num_frames`` is found wherever it was given.
+    '''
+    arguments = inspect.signature(SceneFileWriter.write_frame).bind(None, *args, **kwargs)
+    arguments.apply_defaults()
+    return arguments.arguments.get('num_frames', 1)
+
+
+class StreamingFileWriter(SceneFileWriter):
+    '''`SceneFileWriter` feeding every frame to a single ffmpeg process.'''
+
+    def __init__(self, renderer, scene_name, **kwargs):
+        super().__init__(renderer, scene_name, **kwargs)
+        self.encoder         = None
+        self.frame_pipe      = None
+        self.frame_pipe_path = os.environ.get('NN_FRAME_PIPE')
+        self.frames_written  = 0
+
+
+    def encoder_command(self, width, height):
+        if config.transparent:
+            codec = ['-vcodec', 'qtrle']
+        else:
+            codec = ['-vcodec', 'libx264', '-pix_fmt', 'yuv420p']
+        return [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-s', f'{width}x{height}',
+            '-pix_fmt', 'rgba',
+            '-r', str(config.frame_rate),
+            '-i', '-',
+            '-an',
+            *codec,
+            str(self.movie_file_path),
+        ]
+
+
+    def open_streams(self, frame):
+        height, width = frame.shape[:2]
+        self.encoder = subprocess.Popen(self.encoder_command(width, height), stdin=subprocess.PIPE)
+
+        if self.frame_pipe_path:
+            if not os.path.exists(self.frame_pipe_path):
+                os.mkfifo(self.frame_pipe_path)
+            logger.info(f"Writing raw {width}x{height} RGBA frames to {self.frame_pipe_path}")
+            self.frame_pipe = open(self.frame_pipe_path, 'wb')
+
+
+    def close_streams(self):
+        if self.frame_pipe is not None:
+            self.frame_pipe.close()
+            self.frame_pipe = None
+        if self.encoder is not None:
+            self.encoder.stdin.close()
+            self.encoder.wait()
+            if self.encoder.returncode != 0:
+                raise RuntimeError(f"ffmpeg exited with status {self.encoder.returncode} while encoding {self.movie_file_path}")
+            self.encoder = None
+
+
+    #-- no partial movie files: every animation goes into the same stream
+
+    def begin_animation(self, allow_write=False, file_path=None):
+        pass
+
+
+    def end_animation(self, allow_write=False):
+        pass
+
+
+    def is_already_cached(self, hash_invocation):
+        return False
+
+
+    def add_partial_movie_file(self, hash_animation):
+        pass
+
+
+    def write_frame(self, frame_or_renderer, *args, **kwargs):
+        if not config.write_to_movie:
+            return super().write_frame(frame_or_renderer, *args, **kwargs)
+        frame = frame_or_renderer
+        num_frames = frame_count(frame_or_renderer, *args, **kwargs)
+        if self.encoder is None:
+            self.open_streams(frame)
+
+        data = frame.tobytes()
+        for _ in range(num_frames):
+            self.encoder.stdin.write(data)
+            if self.frame_pipe is not None:
+                self.frame_pipe.write(data)
+        self.frames_written += num_frames
+
+
+    def combine_to_movie(self):
+        if self.encoder is None:
+            logger.info("No frames were rendered, no movie was written.")
+            return
+        self.close_streams()
+        self.print_file_ready_message(self.movie_file_path)
+
+
+    def combine_to_section_videos(self):
+        pass
+
+
+def streaming_enabled():
+    return os.environ.get('NN_STREAM', '') not in ('', '0') and config.renderer == RendererType.CAIRO
+
+
+def renderer_from_env(camera_class=Camera, skip_animations=False):
+    '''A `CairoRenderer` with `StreamingFileWriter` when ``NN_STREAM`` is set, else None.
+
+    Pass the result to ``Scene.__init__``; None keeps manim's default renderer.
+    '''
+    if not streaming_enabled():
+        return None
+    return CairoRenderer(
+        file_writer_class = StreamingFileWriter,
+        camera_class      = camera_class,
+        skip_animations   = skip_animations,
+    )
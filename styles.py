@@ -0,0 +1,98 @@
+'''Mapping of weights (or activations) to edge styles, applied to whole `EdgeBundle`s.
+
+A `WeightStyleMap` turns an array of values into stroke colors, opacities and
+widths for every edge of a layer pair at once. Values are quantized to ``levels``
+steps first, so a bundle never has more distinct styles (and submobjects) than
+that, whatever its number of edges. Restyling a layer pair is then one
+`EdgeBundle.set_edge_styles` call, and an animated change costs a fixed number of
+Python calls per frame instead of one ``set_stroke`` per ``Line`` or ``Arrow``.
+
+    style = WeightStyleMap.fit(weights)
+    style.apply(bundle, weights)
+    connections.add_updater(style.updater(lambda: [current_weights(l) for l in range(num_pairs)]))
+'''
+from manim import *
+
+from batch import diverging_colormap
+
+
+class WeightStyleMap:
+    '''Diverging colormap plus width and opacity scales, as functions of a value.
+
+    Values at ``vmin`` get ``low``, values at ``vmax`` get ``high`` and the middle of
+    the range gets ``mid``. Width and opacity grow linearly with the distance from
+    the middle of the range, from ``min_width``/``min_opacity`` to
+    ``max_width``/``max_opacity``.
+    '''
+
+    def __init__(
+        self,
+        vmin        = -1,
+        vmax        = 1,
+        low         = BLUE,
+        mid         = GREY,
+        high        = RED,
+        min_width   = 0.5,
+        max_width   = 4,
+        min_opacity = 1,
+        max_opacity = 1,
+        levels      = 32,
+        ):
+        assert vmax > vmin, f"Empty value range [{vmin}, {vmax}]."
+        self.vmin        = vmin
+        self.vmax        = vmax
+        self.low         = low
+        self.mid         = mid
+        self.high        = high
+        self.min_width   = min_width
+        self.max_width   = max_width
+        self.min_opacity = min_opacity
+        self.max_opacity = max_opacity
+        self.levels      = levels
+
+
+    @classmethod
+    def fit(cls, values, **kwargs):
+        '''Map with a range symmetric around zero that covers every value.'''
+        scale = max(float(np.abs(values).max(initial=0)), 1e-6)
+        return cls(vmin=-scale, vmax=scale, **kwargs)
+
+
+    def positions(self, values):
+        '''Values scaled to [0, 1] over the range and quantized to ``levels`` steps.'''
+        t = np.clip((np.asarray(values, dtype=float) - self.vmin) / (self.vmax - self.vmin), 0, 1)
+        return np.round(t * (self.levels - 1)) / (self.levels - 1)
+
+
+    def strengths(self, values):
+        '''Distance of the values from the middle of the range, in [0, 1].'''
+        return np.abs(self.positions(values) - 0.5) * 2
+
+
+    def rgbas(self, values):
+        '''``(n, 4)`` float colors, opacity included.'''
+        rgbas = diverging_colormap(self.positions(values), vmin=0, vmax=1, low=self.low, mid=self.mid, high=self.high) / 255
+        rgbas[:, 3] = self.min_opacity + (self.max_opacity - self.min_opacity) * self.strengths(values)
+        return rgbas
+
+
+    def widths(self, values):
+        return self.min_width + (self.max_width - self.min_width) * self.strengths(values)
+
+
+    def apply(self, bundle, values):
+        '''Restyle every edge of ``bundle`` from ``values[k]``, in one call.'''
+        return bundle.set_edge_styles(self.rgbas(values), self.widths(values))
+
+
+    def updater(self, values):
+        '''Updater for a VGroup of bundles (one per layer pair) that restyles them every frame.
+
+        ``values()`` returns one array per bundle, or None for bundles to leave alone
+        (e.g. the bands of layer pairs drawn without edges).
+        '''
+        def update(connections):
+            for bundle, bundle_values in zip(connections, values()):
+                if bundle_values is not None:
+                    self.apply(bundle, bundle_values)
+        return update
@@ -0,0 +1,207 @@
+'''Render a scene for many architectures and seeds from one pool of long-lived workers.
+
+Every job is the scene with its ``layer_sizes`` and ``seed`` replaced, so nothing in
+scene.py has to be edited between renders. The workers are started once and each
+one runs many jobs: manim is imported, fonts are loaded and the label, TeX and
+glyph caches of `labels` are filled once per worker instead of once per render.
+The pool's initializer warms these caches up front by building the network of
+every architecture in the sweep, which declares all their TeX labels to a single
+batched LaTeX run (see `tex_batch`).
+
+    python sweep.py --sizes 2x3x1 2x3x2 4x8x2 --seeds 0 1 2 -j 4
+    python sweep.py --config sweep.json -o sweep_report.json
+
+A config file holds the same settings as the command line, e.g.
+
+    {"architectures": ["2x3x2", [4, 8, 8, 1]], "seeds": [0, 1], "quality": "l"}
+
+Architectures are ``inputs x hidden width x hidden layers`` (one output) or explicit
+lists of layer sizes, written ``4,8,8,1`` on the command line.
+'''
+import argparse
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from parallel_render import QUALITIES
+from sizes import parse_size
+
+
+DEFAULTS = {
+    'module'        : 'scene',
+    'scene'         : 'NeuralNetworkVisualisation',
+    'architectures' : ['2x3x1', '2x3x2', '3x4x2'],
+    'seeds'         : [0],
+    'quality'       : 'l',
+    'jobs'          : os.cpu_count(),
+    'media_dir'     : 'media/sweep',
+}
+# Font sizes of the value labels the scenes build from glyph atlases.
+ATLAS_FONT_SIZES = (12, 14)
+
+# Seconds the initializer of this worker took, reported with its first job.
+_warm_up_seconds = None
+
+
+def parse_architecture(architecture):
+    '''Layer sizes from ``'2x3x2'``, ``'2,3,3,1'`` or a list of sizes.'''
+    if isinstance(architecture, str):
+        if 'x' in architecture:
+            return parse_size(architecture)
+        return [int(size) for size in architecture.split(',')]
+    return [int(size) for size in architecture]
+
+
+def job_name(scene_name, layer_sizes, seed):
+    '''Scene class name of a job; also names its movie and partial movie directory.'''
+    return f"{scene_name}_{'_'.join(map(str, layer_sizes))}_seed{seed}"
+
+
+def job_config(quality, media_dir):
+    '''manim config of every job; the media (and TeX) directory is shared so cached TeX is reused.'''
+    return {
+        'quality'      : QUALITIES[quality],
+        'media_dir'    : media_dir,
+        'progress_bar' : 'none',
+        'verbosity'    : 'WARNING',
+    }
+
+
+def warm_up(module_name, scene_name, architectures, quality, media_dir):
+    '''Pool initializer: import the scene and fill the label caches for every architecture.'''
+    global _warm_up_seconds
+    start = time.perf_counter()
+
+    from manim import tempconfig
+    from labels import get_atlas
+    from network import NetworkMobject
+
+    module = importlib.import_module(module_name)
+    scene_cls = getattr(module, scene_name)
+    with tempconfig(job_config(quality, media_dir)):
+        if hasattr(scene_cls, 'layer_sizes'):
+            #-- building every network prefetches all layer titles and node labels, then compiles them at once
+            for layer_sizes in architectures:
+                NetworkMobject(layer_sizes, style='scene', lod=getattr(scene_cls, 'lod', None))
+        for font_size in ATLAS_FONT_SIZES:
+            get_atlas(font_size)
+
+    _warm_up_seconds = time.perf_counter() - start
+
+
+def render_job(module_name, scene_name, layer_sizes, seed, quality, media_dir):
+    '''Render one configuration in this worker; returns its timings and cache statistics.'''
+    global _warm_up_seconds
+    from manim import tempconfig
+    from labels import label_factory
+
+    scene_cls = getattr(importlib.import_module(module_name), scene_name)
+    name = job_name(scene_name, layer_sizes, seed)
+    job_cls = type(name, (scene_cls,), {'layer_sizes': list(layer_sizes), 'seed': seed})
+
+    hits, misses = label_factory.hits, label_factory.misses
+    batches = label_factory.tex_batch.compiled_batches if label_factory.tex_batch is not None else 0
+    start = time.perf_counter()
+    with tempconfig(job_config(quality, media_dir)):
+        scene = job_cls()
+        scene.render()
+        movie = str(scene.renderer.file_writer.movie_file_path)
+    seconds = time.perf_counter() - start
+
+    warm_up_seconds, _warm_up_seconds = _warm_up_seconds, None
+    return {
+        'name'         : name,
+        'layer_sizes'  : list(layer_sizes),
+        'seed'         : seed,
+        'movie'        : movie,
+        'render_s'     : seconds,
+        'warm_up_s'    : warm_up_seconds,
+        'worker'       : os.getpid(),
+        'label_hits'   : label_factory.hits - hits,
+        'label_misses' : label_factory.misses - misses,
+        'tex_batches'  : (label_factory.tex_batch.compiled_batches if label_factory.tex_batch is not None else 0) - batches,
+    }
+
+
+def run_sweep(settings):
+    '''Render every (architecture, seed) pair of ``settings``; returns the job reports in sweep order.'''
+    architectures = [parse_architecture(architecture) for architecture in settings['architectures']]
+    jobs = list(itertools.product(range(len(architectures)), settings['seeds']))
+    #-- biggest networks first, so a large job does not start last on an otherwise idle pool
+    order = sorted(jobs, key=lambda job: -sum(a * b for a, b in zip(architectures[job[0]], architectures[job[0]][1:])))
+
+    reports = {}
+    with ProcessPoolExecutor(
+        max_workers = min(settings['jobs'], len(jobs)),
+        mp_context  = multiprocessing.get_context('spawn'),
+        initializer = warm_up,
+        initargs    = (settings['module'], settings['scene'], architectures, settings['quality'], settings['media_dir']),
+    ) as pool:
+        futures = {
+            pool.submit(render_job, settings['module'], settings['scene'], architectures[a], seed, settings['quality'], settings['media_dir']): (a, seed)
+            for a, seed in order
+        }
+        for future in as_completed(futures):
+            report = future.result()
+            reports[futures[future]] = report
+            print(f"{report['name']}: {report['render_s']:.1f}s (worker {report['worker']}, "
+                  f"{report['label_hits']} label hits, {report['label_misses']} misses)")
+
+    return [reports[job] for job in jobs]
+
+
+def print_report(reports, wall):
+    print(f"{'job':<48} {'worker':>8} {'warm-up':>8} {'render':>8} {'hits':>7} {'misses':>7}")
+    for report in reports:
+        warm_up = f"{report['warm_up_s']:.1f}s" if report['warm_up_s'] is not None else '-'
+        print(f"{report['name']:<48} {report['worker']:>8} {warm_up:>8} {report['render_s']:>7.1f}s "
+              f"{report['label_hits']:>7} {report['label_misses']:>7}")
+    total = sum(report['render_s'] for report in reports)
+    print(f"{len(reports)} jobs on {len({report['worker'] for report in reports})} workers: "
+          f"{total:.1f}s of rendering in {wall:.1f}s wall time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--config', default=None, help='JSON file with any of the settings below')
+    parser.add_argument('--module', default=None)
+    parser.add_argument('--scene', default=None)
+    parser.add_argument('--sizes', nargs='+', default=None, help="architectures, e.g. 2x3x2 or 2,3,3,1")
+    parser.add_argument('--seeds', type=int, nargs='+', default=None)
+    parser.add_argument('-q', '--quality', choices=QUALITIES, default=None)
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('--media-dir', default=None)
+    parser.add_argument('-o', '--output', default=None, help='write the job reports as JSON')
+    args = parser.parse_args()
+
+    settings = dict(DEFAULTS)
+    if args.config is not None:
+        with open(args.config) as file:
+            settings.update(json.load(file))
+    overrides = {
+        'module'        : args.module,
+        'scene'         : args.scene,
+        'architectures' : args.sizes,
+        'seeds'         : args.seeds,
+        'quality'       : args.quality,
+        'jobs'          : args.jobs,
+        'media_dir'     : args.media_dir,
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+
+    start = time.perf_counter()
+    reports = run_sweep(settings)
+    print_report(reports, time.perf_counter() - start)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'settings': settings, 'jobs': reports}, file, indent=1)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from loader import load_model
+
+
+def test_bias_less_torch_layout_is_transposed(tmp_path):
+    rng = np.random.default_rng(0)
+    w1, w2 = rng.normal(size=(4, 3)), rng.normal(size=(2, 4))
+    path = tmp_path / 'torch.npz'
+    np.savez(path, **{'l1.weight': w1, 'l2.weight': w2})
+
+    model = load_model(str(path), rng=rng)
+    assert model.layer_sizes == [3, 4, 2]
+    np.testing.assert_array_equal(np.asarray(model.weights[0]), w1.T)
+    np.testing.assert_array_equal(np.asarray(model.weights[1]), w2.T)
+
+
+def test_bias_less_keras_layout_is_kept(tmp_path):
+    rng = np.random.default_rng(0)
+    w1, w2 = rng.normal(size=(3, 4)), rng.normal(size=(4, 2))
+    path = tmp_path / 'keras.npz'
+    np.savez(path, w1, w2)
+
+    model = load_model(str(path), rng=rng)
+    assert model.layer_sizes == [3, 4, 2]
+    np.testing.assert_array_equal(np.asarray(model.weights[0]), w1)
+    np.testing.assert_array_equal(np.asarray(model.weights[1]), w2)
+
+
+def test_square_layers_follow_the_others(tmp_path):
+    rng = np.random.default_rng(0)
+    weights = {'l1.weight': rng.normal(size=(4, 3)), 'l2.weight': rng.normal(size=(4, 4)), 'l3.weight': rng.normal(size=(2, 4))}
+    path = tmp_path / 'torch.npz'
+    np.savez(path, **weights)
+
+    model = load_model(str(path), rng=rng)
+    assert model.layer_sizes == [3, 4, 4, 2]
+    np.testing.assert_array_equal(np.asarray(model.weights[1]), weights['l2.weight'].T)
+
+
+def test_ambiguous_orientation_raises(tmp_path):
+    rng = np.random.default_rng(0)
+    path = tmp_path / 'square.npz'
+    np.savez(path, rng.normal(size=(3, 3)), rng.normal(size=(3, 3)))
+
+    with pytest.raises(ValueError, match='transpose'):
+        load_model(str(path), rng=rng)
+
+
+def test_unchained_shapes_raise(tmp_path):
+    rng = np.random.default_rng(0)
+    path = tmp_path / 'broken.npz'
+    np.savez(path, rng.normal(size=(3, 4)), rng.normal(size=(5, 2)))
+
+    with pytest.raises(ValueError, match='do not chain'):
+        load_model(str(path), rng=rng)
@@ -0,0 +1,149 @@
+'''Compile many ``MathTex``/``Tex`` expressions with a single LaTeX run.
+
+manim compiles every distinct TeX expression on its own: one ``latex`` and one
+``dvisvgm`` process per label, which dominates the cold-cache start of a large
+network. `TexBatch` collects the expressions a scene is going to need, writes them
+as the pages of one document (one ``preview`` environment per expression), runs
+``latex`` once and ``dvisvgm`` once over all pages, and stores each page's SVG
+where manim looks for that expression's cached SVG. Building the mobjects then
+only parses SVGs.
+
+`labels.label_factory` owns a batch: `LabelFactory.prefetch` declares expressions
+and the first TeX label actually built compiles everything declared so far.
+Expressions manim would rewrite before compiling (see `manim_expression`) and
+templates producing PDF are left to manim's usual per-expression compilation, as
+is everything in a batch that fails to compile.
+'''
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+
+from manim import MathTex, Tex, config, logger
+from manim.utils.tex_file_writing import generate_tex_file
+
+
+# Minimum digits of the page numbers in the SVG files written by dvisvgm.
+PAGE_DIGITS = 3
+
+
+def tex_environment(cls):
+    '''Environment manim wraps ``cls``'s expressions in, or None for non-TeX classes.'''
+    if not isinstance(cls, type):
+        return None
+    if issubclass(cls, Tex):
+        return 'center'
+    if issubclass(cls, MathTex):
+        return 'align*'
+    return None
+
+
+def manim_expression(tex):
+    '''The expression manim compiles for a single-string label, or None when it rewrites it.'''
+    tex = tex.strip()
+    rewritten = (
+        not tex
+        or tex.startswith('\\\\')
+        or tex.endswith(('_', '^', 'dot'))
+        or tex in ('\\over', '\\overline', '\\sqrt', '\\sqrt{', '\\substack')
+        or '\\left' in tex or '\\right' in tex
+        or '{{' in tex or '}}' in tex
+    )
+    return None if rewritten else tex
+
+
+def cached_svg_path(expression, environment, tex_template=None):
+    '''Path of the SVG manim's ``tex_to_svg_file`` reuses for this expression.'''
+    if tex_template is None:
+        tex_template = config.tex_template
+    return Path(generate_tex_file(expression, environment, tex_template)).with_suffix('.svg')
+
+
+class TexBatch:
+    '''Expressions waiting to be compiled together, see the module docstring.'''
+
+    def __init__(self):
+        self.pending = {}
+        self.compiled_batches = 0
+
+
+    def add(self, text, cls):
+        '''Declare a label ``cls(text)``; returns whether it was queued.'''
+        environment = tex_environment(cls)
+        expression = manim_expression(text) if environment is not None else None
+        if expression is None or (expression, environment) in self.pending:
+            return False
+        svg = cached_svg_path(expression, environment)
+        if svg.exists():
+            return False
+        self.pending[(expression, environment)] = svg
+        return True
+
+
+    def document(self, tex_template, entries):
+        pages = [
+            f"\\begin{{preview}}\n\\begin{{{environment}}}\n{expression}\n\\end{{{environment}}}\n\\end{{preview}}\n"
+            for expression, environment in entries
+        ]
+        return (
+            "\\documentclass{article}\n"
+            f"{tex_template.preamble}\n"
+            "\\usepackage[active,tightpage]{preview}\n"
+            "\\begin{document}\n"
+            f"{tex_template.post_doc_commands}\n"
+            + ''.join(pages)
+            + "\\end{document}\n"
+        )
+
+
+    def compile(self):
+        '''Compile every pending expression at once; failures are left to manim.'''
+        if not self.pending:
+            return
+        entries = list(self.pending)
+        svgs = list(self.pending.values())
+        self.pending = {}
+
+        tex_template = config.tex_template
+        if tex_template.output_format not in ('.dvi', '.xdv'):
+            return
+
+        tex_dir = Path(config.get_dir('tex_dir'))
+        tex_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256(repr(entries).encode()).hexdigest()[:16]
+        tex_file = tex_dir / f'batch_{digest}.tex'
+        tex_file.write_text(self.document(tex_template, entries), encoding='utf-8')
+
+        compiler = [tex_template.tex_compiler, '-interaction=batchmode', '-halt-on-error', f'-output-directory={tex_dir}']
+        if tex_template.tex_compiler == 'xelatex':
+            compiler.append('-no-pdf')
+        result = subprocess.run([*compiler, str(tex_file)], cwd=tex_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            logger.warning(f"Batched TeX compilation failed (see {tex_file.with_suffix('.log')}); compiling labels one by one.")
+            return
+
+        #-- a bare %p is zero-padded to the digits of the page count; a fixed width makes the names predictable
+        pattern = tex_dir / f'batch_{digest}-%{PAGE_DIGITS}p.svg'
+        result = subprocess.run(
+            ['dvisvgm', str(tex_file.with_suffix(tex_template.output_format)), '-p', '1-', '-n', '-v', '0', '-o', str(pattern)],
+            cwd=tex_dir,
+        )
+        pages = [tex_dir / f'batch_{digest}-{page:0{PAGE_DIGITS}d}.svg' for page in range(1, len(entries) + 1)]
+        if result.returncode != 0 or not all(page.exists() for page in pages):
+            logger.warning("Batched TeX conversion did not produce one SVG per expression; compiling labels one by one.")
+            for page in pages:
+                page.unlink(missing_ok=True)
+            return
+
+        for page, svg in zip(pages, svgs):
+            os.replace(page, svg)
+        if not config.no_latex_cleanup:
+            for suffix in ('.aux', '.log', tex_template.output_format):
+                tex_file.with_suffix(suffix).unlink(missing_ok=True)
+        self.compiled_batches += 1
+
+
+    def ensure(self, text, cls):
+        '''Make sure ``cls(text)`` finds a cached SVG, compiling the pending batch with it if needed.'''
+        self.add(text, cls)
+        self.compile()
@@ -0,0 +1,368 @@
+'''Training of the network drawn by `NeuralNetworkVisualisation`, and a scene animating it.
+
+`Trainer` runs mini-batch SGD with plain NumPy backpropagation on a mean squared
+error loss; every layer, the output included, is ``f(a @ W + bias_value * b)`` with
+the model's activation ``f`` for that layer, like `model.NetworkModel.forward`.
+While training, the parameters are copied into one preallocated float32 array (at
+most ``max_snapshots`` rows), so recording costs a row copy per snapshot and no
+allocation.
+
+The scene only animates a few keyframes of that history, interpolating linearly
+between them, so the render time depends on the run time of the animation, not
+on the number of training steps:
+
+    manim -ql training.py TrainingVisualisation
+'''
+from manim import *
+
+from model import propagate
+from scene import NeuralNetworkVisualisation
+from sparse import backpropagate, is_sparse, weight_gradient, weight_values
+from styles import WeightStyleMap
+
+
+TRAINING_STEPS = 10000
+LEARNING_RATE = 0.1
+TRAINING_BATCH_SIZE = 32
+MAX_SNAPSHOTS = 2000
+NUM_KEYFRAMES = 120
+TRAINING_RUN_TIME = 8
+
+
+def xor_dataset(num_samples=256, rng=None):
+    '''Noisy XOR: inputs around the corners of the unit square, targets -1 or 1.'''
+    if rng is None:
+        rng = np.random.default_rng()
+    corners = rng.integers(0, 2, size=(num_samples, 2))
+    inputs = corners + rng.normal(0, 0.1, size=corners.shape)
+    targets = np.where(corners[:, 0] != corners[:, 1], 1.0, -1.0)[:, None]
+    return inputs, targets
+
+
+def teacher_dataset(layer_sizes, num_samples=256, rng=None):
+    '''Targets produced by a random tanh network of the same architecture.'''
+    if rng is None:
+        rng = np.random.default_rng()
+    inputs = rng.uniform(-1, 1, size=(num_samples, layer_sizes[0]))
+    a = inputs
+    for n_in, n_out in zip(layer_sizes, layer_sizes[1:]):
+        a = np.tanh(a @ rng.normal(0, 1.5 / np.sqrt(n_in), size=(n_in, n_out)) + rng.normal(0, 0.5, size=n_out))
+    return inputs, a
+
+
+def make_dataset(layer_sizes, num_samples=256, rng=None):
+    '''XOR for a 2-input, 1-output network, a teacher network's outputs otherwise.'''
+    if layer_sizes[0] == 2 and layer_sizes[-1] == 1:
+        return xor_dataset(num_samples, rng)
+    return teacher_dataset(layer_sizes, num_samples, rng)
+
+
+class Keyframes:
+    '''Parameters at a few training steps, interpolated linearly in between.'''
+
+    def __init__(self, steps, parameters):
+        self.steps      = np.asarray(steps, dtype=float)
+        self.parameters = np.asarray(parameters)
+
+
+    def __len__(self):
+        return len(self.steps)
+
+
+    def at(self, alpha):
+        '''``(step, parameters)`` at ``alpha`` in [0, 1] of the way through the keyframes.'''
+        if len(self) == 1:
+            return self.steps[0], self.parameters[0].astype(float)
+        x = np.clip(alpha, 0, 1) * (len(self) - 1)
+        k = min(int(x), len(self) - 2)
+        f = x - k
+        step = self.steps[k] + f * (self.steps[k+1] - self.steps[k])
+        return step, (1 - f) * self.parameters[k] + f * self.parameters[k+1]
+
+
+class TrainingHistory:
+    '''Parameter snapshots and per-step losses of a training run.
+
+    ``snapshots[s]`` is the flat parameter vector (see `Trainer.flat_index`) after
+    step ``snapshot_steps[s]``; row 0 holds the parameters before training.
+    '''
+
+    def __init__(self, snapshots, snapshot_steps, losses):
+        self.snapshots      = snapshots
+        self.snapshot_steps = snapshot_steps
+        self.losses         = losses
+
+
+    def keyframes(self, num_keyframes, mode='change'):
+        '''Sample ``num_keyframes`` snapshots.
+
+        ``'uniform'`` spaces them evenly in training steps. ``'change'`` spaces them
+        evenly in accumulated parameter change, so the fast early phase of training
+        gets more keyframes (and more animation time) than the plateau.
+        '''
+        num_keyframes = max(2, min(num_keyframes, len(self.snapshots)))
+        if mode == 'uniform':
+            indices = np.linspace(0, len(self.snapshots) - 1, num_keyframes)
+        elif mode == 'change':
+            distance = np.concatenate([[0], np.cumsum(np.linalg.norm(np.diff(self.snapshots, axis=0), axis=1))])
+            targets = np.linspace(0, distance[-1], num_keyframes)
+            indices = np.searchsorted(distance, targets).clip(0, len(self.snapshots) - 1)
+        else:
+            raise ValueError(f"Unsupported keyframe mode `{mode}`.")
+
+        indices = np.unique(np.round(indices).astype(int))
+        return Keyframes(self.snapshot_steps[indices], self.snapshots[indices])
+
+
+    def smoothed_losses(self, num_points=500):
+        '''``(steps, losses)`` averaged over windows, at most ``num_points`` of them.'''
+        window = max(1, len(self.losses) // num_points)
+        usable = len(self.losses) // window * window
+        losses = self.losses[:usable].reshape(-1, window).mean(axis=1)
+        steps = np.arange(len(losses)) * window + window
+        return steps, losses
+
+
+class Trainer:
+    '''Mini-batch SGD on the weights and biases of a `model.NetworkModel`.
+
+    The model itself is left untouched until `apply_to` is called; memory-mapped
+    weights are copied into memory first. Only the stored entries of
+    `sparse.SparseWeights` are trained (and snapshotted), so pruned connections
+    stay pruned.
+    '''
+
+    def __init__(self, model, learning_rate=LEARNING_RATE, batch_size=TRAINING_BATCH_SIZE, rng=None):
+        self.weights       = [w.copy() if is_sparse(w) else np.array(w[:], dtype=float) for w in model.weights]
+        self.biases        = [np.array(b, dtype=float) for b in model.biases]
+        self.bias_values   = np.array(model.bias_values, dtype=float)
+        self.activation_functions = list(model.activation_functions)
+        self.learning_rate = learning_rate
+        self.batch_size    = batch_size
+        self.rng           = rng if rng is not None else np.random.default_rng()
+
+        #-- the flat parameter vector is [w_0, b_0, w_1, b_1, ...]
+        sizes = [size for w, b in zip(self.weights, self.biases) for size in (weight_values(w).size, b.size)]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+
+    @property
+    def num_parameters(self):
+        return int(self.offsets[-1])
+
+
+    def flat_parameters(self, out=None):
+        '''All parameters as one vector, written into ``out`` when given.'''
+        if out is None:
+            out = np.empty(self.num_parameters)
+        for k, array in enumerate(p for w, b in zip(self.weights, self.biases) for p in (weight_values(w), b)):
+            out[self.offsets[k]:self.offsets[k+1]] = array.ravel()
+        return out
+
+
+    def unflatten(self, flat):
+        '''``(weights, biases)`` lists of views into a flat parameter vector.'''
+        weights, biases = [], []
+        for l, (w, b) in enumerate(zip(self.weights, self.biases)):
+            values = flat[self.offsets[2*l]:self.offsets[2*l+1]]
+            weights.append(w.with_data(values) if is_sparse(w) else values.reshape(w.shape))
+            biases.append(flat[self.offsets[2*l+1]:self.offsets[2*l+2]])
+        return weights, biases
+
+
+    def flat_index(self, layer_idx, rows, cols):
+        '''Position in the flat vector of the extended weights ``(rows[k], cols[k])``.
+
+        Row ``layer_sizes[layer_idx]`` is the bias node, as in `NetworkModel.weight_entries`.
+        Entries sparse weights do not store have no parameter; asking for them is an error.
+        '''
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        w = self.weights[layer_idx]
+        num_rows, num_cols = w.shape
+        is_bias = rows == num_rows
+        if is_sparse(w):
+            positions = w.positions(np.where(is_bias, 0, rows), cols)
+            assert np.all(positions[~is_bias] >= 0), "Some of the requested connections are not stored in the sparse weights."
+        else:
+            positions = rows * num_cols + cols
+        return np.where(
+            is_bias,
+            self.offsets[2*layer_idx+1] + cols,
+            self.offsets[2*layer_idx] + positions,
+        )
+
+
+    def forward(self, inputs, pre_activations=None):
+        '''Activations of every layer with the trained parameters, see `model.propagate`.'''
+        return propagate(inputs, self.weights, self.biases, self.bias_values, self.activation_functions, pre_activations)
+
+
+    def loss(self, inputs, targets):
+        return 0.5 * np.mean(np.sum((self.forward(inputs)[-1] - targets) ** 2, axis=1))
+
+
+    def gradients(self, inputs, targets):
+        '''``(loss, weight gradients, bias gradients)`` of the mean squared error on a batch.'''
+        pre_activations = []
+        activations = self.forward(inputs, pre_activations)
+        error = activations[-1] - targets
+        loss = 0.5 * np.mean(np.sum(error ** 2, axis=1))
+
+        grad_weights, grad_biases = [], []
+        delta = self.activation_functions[-1].backward(pre_activations[-1], activations[-1], error / len(inputs))
+        for l in reversed(range(len(self.weights))):
+            grad_weights.append(weight_gradient(self.weights[l], activations[l], delta))
+            grad_biases.append(self.bias_values[l] * delta.sum(axis=0))
+            if l > 0:
+                delta = self.activation_functions[l-1].backward(pre_activations[l-1], activations[l], backpropagate(delta, self.weights[l]))
+
+        return loss, grad_weights[::-1], grad_biases[::-1]
+
+
+    def step(self, inputs, targets):
+        loss, grad_weights, grad_biases = self.gradients(inputs, targets)
+        for w, b, grad_w, grad_b in zip(self.weights, self.biases, grad_weights, grad_biases):
+            weight_values(w)[...] -= self.learning_rate * grad_w
+            b -= self.learning_rate * grad_b
+        return loss
+
+
+    def train(self, inputs, targets, steps=TRAINING_STEPS, max_snapshots=MAX_SNAPSHOTS):
+        '''Run ``steps`` SGD steps; returns a `TrainingHistory`.
+
+        A snapshot is taken every ``ceil(steps / max_snapshots)`` steps (and after
+        the last one) into an array allocated up front.
+        '''
+        inputs = np.asarray(inputs, dtype=float)
+        targets = np.asarray(targets, dtype=float).reshape(len(inputs), -1)
+        every = max(1, -(-steps // max_snapshots))
+
+        snapshot_steps = np.unique(np.append(np.arange(0, steps + 1, every), steps))
+        snapshots = np.empty((len(snapshot_steps), self.num_parameters), dtype=np.float32)
+        losses = np.empty(steps, dtype=np.float32)
+
+        self.flat_parameters(out=snapshots[0])
+        s = 1
+        for step in range(1, steps + 1):
+            batch = self.rng.integers(0, len(inputs), size=min(self.batch_size, len(inputs)))
+            losses[step-1] = self.step(inputs[batch], targets[batch])
+            if s < len(snapshot_steps) and step == snapshot_steps[s]:
+                self.flat_parameters(out=snapshots[s])
+                s += 1
+
+        return TrainingHistory(snapshots, snapshot_steps, losses)
+
+
+    def apply_to(self, model):
+        '''Copy the trained parameters into ``model`` and redo its forward pass.'''
+        model.weights = [w.copy() for w in self.weights]
+        model.biases  = [b.copy() for b in self.biases]
+        model.forward()
+        return model
+
+
+class TrainingVisualisation(NeuralNetworkVisualisation):
+    '''The network's weights changing over a training run, with the loss curve.
+
+    Edges are styled by a `styles.WeightStyleMap`: blue (negative) through grey to
+    red (positive), wider with ``|w|``. A single ``play`` moves a tracker through the
+    keyframes; every frame interpolates the parameters and restyles each layer
+    pair's `EdgeBundle` with one array update.
+    '''
+    training_steps = TRAINING_STEPS
+    learning_rate  = LEARNING_RATE
+    batch_size     = TRAINING_BATCH_SIZE
+    num_keyframes  = NUM_KEYFRAMES
+    run_time       = TRAINING_RUN_TIME
+    max_edge_width = 4
+
+    def create_dataset(self):
+        return make_dataset(self.model.layer_sizes, rng=np.random.default_rng((self.seed, 2)))
+
+
+    def train(self):
+        inputs, targets = self.create_dataset()
+        self.trainer = Trainer(self.model, self.learning_rate, self.batch_size, rng=np.random.default_rng((self.seed, 3)))
+        return self.trainer.train(inputs, targets, self.training_steps)
+
+
+    def edge_parameter_indices(self):
+        '''Flat parameter index of every drawn edge, per layer pair (None for bands).'''
+        indices = []
+        for layer_idx in range(len(self.network) - 1):
+            if len(self.edges[layer_idx][0]) == 0:
+                indices.append(None)
+                continue
+            indices.append(self.trainer.flat_index(layer_idx, self.network.edge_sources(layer_idx), self.network.edge_targets(layer_idx)))
+        return indices
+
+
+    def create_loss_plot(self, history):
+        steps, losses = history.smoothed_losses()
+        y_max = float(losses.max()) * 1.1 or 1
+
+        axes = Axes(
+            x_range  = [0, self.training_steps, self.training_steps / 4],
+            y_range  = [0, y_max, y_max / 2],
+            x_length = 3,
+            y_length = 1.5,
+            tips     = False,
+            axis_config = {'stroke_width': 1, 'include_ticks': False},
+        )
+        axes.to_corner(DR, buff=0.3)
+        title = Text('loss', font_size=14).next_to(axes, UP, buff=0.1)
+
+        #-- the axes are linear, so every point comes from the origin and two unit vectors
+        origin = axes.coords_to_point(0, 0)
+        x_unit = axes.coords_to_point(1, 0) - origin
+        y_unit = axes.coords_to_point(0, 1) - origin
+        curve = VMobject(stroke_color=YELLOW, stroke_width=2)
+        curve.set_points_as_corners(origin + steps[:, None] * x_unit + losses[:, None] * y_unit)
+        return VGroup(axes, title), curve
+
+
+    @classmethod
+    def num_sections(cls):
+        #-- `construct` never calls `begin_section`, so the whole scene is one section
+        return 1
+
+
+    def construct(self):
+        self.create_model()
+        layers = self.create_layers()
+        self.play(Create(layers, run_time=2))
+        connections = self.create_connections()
+        self.play(Create(connections), run_time=1)
+
+        history = self.train()
+        keyframes = history.keyframes(self.num_keyframes)
+        indices = self.edge_parameter_indices()
+        edge_style = WeightStyleMap.fit(keyframes.parameters, max_width=self.max_edge_width)
+
+        plot, full_curve = self.create_loss_plot(history)
+        curve = full_curve.copy()
+        step_label = Integer(0, font_size=18).next_to(plot, UP, buff=0.1)
+        self.play(FadeIn(plot), FadeIn(step_label))
+
+        progress = ValueTracker(0)
+        def edge_weights():
+            _, parameters = keyframes.at(progress.get_value())
+            return [None if edge_indices is None else parameters[edge_indices] for edge_indices in indices]
+
+        def update_curve(mobject):
+            step, _ = keyframes.at(progress.get_value())
+            mobject.pointwise_become_partial(full_curve, 0, step / self.training_steps)
+
+        connections.add_updater(edge_style.updater(edge_weights))
+        curve.add_updater(update_curve)
+        step_label.add_updater(lambda mobject: mobject.set_value(keyframes.at(progress.get_value())[0]))
+        self.add(curve)
+
+        self.play(progress.animate.set_value(1), run_time=self.run_time, rate_func=linear)
+        connections.clear_updaters()
+        curve.clear_updaters()
+        step_label.clear_updaters()
+
+        self.trainer.apply_to(self.model)
+        self.wait(1)